@@ -57,3 +57,5 @@ SWEDISH_HOLIDAYS = [
     '12-31',  # New Year's Eve
 ]
 
+# Holidays as (month, day) tuples for O(1) lookup without per-row string formatting
+SWEDISH_HOLIDAYS_MD = frozenset((int(md[:2]), int(md[3:5])) for md in SWEDISH_HOLIDAYS)
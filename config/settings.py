@@ -2,16 +2,53 @@
 Global configuration file
 """
 import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
 import pytz
 
-# Load environment variables
-load_dotenv()
 
-# API Keys
-ENTSOE_API_KEY = os.getenv('ENTSOE_API_KEY')
-HOPSWORKS_API_KEY = os.getenv('HOPSWORKS_API_KEY')
-HOPSWORKS_PROJECT_NAME = os.getenv('HOPSWORKS_PROJECT_NAME', 'electricity_price_prediction')
+@dataclass(frozen=True)
+class Settings:
+    """Environment-dependent settings (API keys, project names)"""
+    entsoe_api_key: Optional[str]
+    hopsworks_api_key: Optional[str]
+    hopsworks_project_name: str
+    entsoe_enable_fallback: bool
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load environment variables once per process and return the settings
+    
+    Returns:
+        Cached Settings instance
+    """
+    load_dotenv()
+    return Settings(
+        entsoe_api_key=os.getenv('ENTSOE_API_KEY'),
+        hopsworks_api_key=os.getenv('HOPSWORKS_API_KEY'),
+        hopsworks_project_name=os.getenv('HOPSWORKS_PROJECT_NAME', 'electricity_price_prediction'),
+        # Set ENTSOE_ENABLE_FALLBACK=0 to skip the entsoe-py fallback when the raw API call fails
+        entsoe_enable_fallback=os.getenv('ENTSOE_ENABLE_FALLBACK', '1').lower() not in ('0', 'false', 'no'),
+    )
+
+
+# API Keys (module-level names kept for backward compatibility, resolved lazily)
+_SETTINGS_ATTRIBUTES = {
+    'ENTSOE_API_KEY': 'entsoe_api_key',
+    'HOPSWORKS_API_KEY': 'hopsworks_api_key',
+    'HOPSWORKS_PROJECT_NAME': 'hopsworks_project_name',
+    'ENTSOE_ENABLE_FALLBACK': 'entsoe_enable_fallback',
+}
+
+
+def __getattr__(name: str):
+    if name in _SETTINGS_ATTRIBUTES:
+        return getattr(get_settings(), _SETTINGS_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Region configuration
 SE3_REGION = 'SE_3'
@@ -28,6 +65,10 @@ SE3_LOCATIONS = [
     {"name": "Norrköping", "lat": 58.59, "lon": 16.19, "weight": 0.2}
 ]
 
+# Optional numba acceleration (pip install numba): below this many rows the NumPy kernels
+# are faster than paying the JIT compile, so daily runs never touch numba
+NUMBA_MIN_ROWS = 100_000
+
 # Data configuration
 BACKFILL_START_DATE = "2024-01-01"
 TRAINING_WINDOW_MONTHS = 6
@@ -0,0 +1,72 @@
+"""
+On-disk DataFrame cache shared by the data clients
+"""
+import pandas as pd
+import os
+import threading
+import time
+from pathlib import Path
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _discard(path: Path) -> None:
+    """Delete a cache or temporary file if it exists (best effort)"""
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning(f"⚠️  删除缓存文件失败: {path}: {e}")
+
+
+def read_cached(path: Path, max_age: pd.Timedelta = None, log_prefix: str = ''):
+    """
+    Read a cached DataFrame
+    
+    Args:
+        path: Parquet cache file
+        max_age: Maximum age of the file (None: never expires)
+        log_prefix: Prefix of the log messages (e.g. the data source)
+    
+    Returns:
+        Cached DataFrame, or None if missing, expired or unreadable (unreadable files are deleted)
+    """
+    try:
+        modified = path.stat().st_mtime
+    except OSError:
+        return None
+    if max_age is not None and time.time() - modified > max_age.total_seconds():
+        return None
+    try:
+        df = pd.read_parquet(path)
+        logger.info(f"📁 {log_prefix}使用缓存数据: {path} ({len(df)} 条记录)")
+        return df
+    except Exception as e:
+        logger.warning(f"⚠️  {log_prefix}读取缓存失败，删除并重新获取: {e}")
+        _discard(path)
+        return None
+
+
+def write_cached(path: Path, df: pd.DataFrame, log_prefix: str = '') -> None:
+    """
+    Write a DataFrame to the cache (failures are logged, never raised)
+    
+    The file is written to a temporary file next to it and then renamed into place,
+    so readers never see a partially written cache file.
+    
+    Args:
+        path: Parquet cache file
+        df: Data to cache
+        log_prefix: Prefix of the log messages (e.g. the data source)
+    """
+    # Unique per writer, so concurrent writes of the same key never share a temporary file
+    tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, path)
+        logger.info(f"💾 {log_prefix}数据已缓存到: {path}")
+    except Exception as e:
+        _discard(tmp_path)
+        logger.warning(f"⚠️  {log_prefix}写入缓存失败: {e}")
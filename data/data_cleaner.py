@@ -3,13 +3,69 @@ Data Cleaning and Preprocessing Module
 """
 import pandas as pd
 import numpy as np
-from config.settings import MAX_MISSING_HOURS
+from config.settings import MAX_MISSING_HOURS, NUMBA_MIN_ROWS
 import logging
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to NumPy block labelling
+    njit = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _missing_block_sizes_numpy(is_missing: np.ndarray) -> np.ndarray:
+    """
+    Size of the consecutive missing block each row belongs to (NumPy version)
+    
+    Args:
+        is_missing: Boolean missing-value mask of one column
+        
+    Returns:
+        Array with the block size for missing rows (non-missing rows are 0)
+    """
+    block_id = np.cumsum(is_missing != np.r_[False, is_missing[:-1]])
+    block_sizes = np.bincount(block_id, weights=is_missing)
+    return np.where(is_missing, block_sizes[block_id], 0).astype(np.int64)
+
+
+def _missing_block_sizes_loop(is_missing: np.ndarray) -> np.ndarray:
+    """
+    Size of the consecutive missing block each row belongs to (single pass, JIT target)
+    
+    Args:
+        is_missing: Boolean missing-value mask of one column
+        
+    Returns:
+        Array with the block size for missing rows (non-missing rows are 0)
+    """
+    n = is_missing.shape[0]
+    sizes = np.zeros(n, dtype=np.int64)
+    i = 0
+    while i < n:
+        if is_missing[i]:
+            j = i
+            while j < n and is_missing[j]:
+                j += 1
+            sizes[i:j] = j - i
+            i = j
+        else:
+            i += 1
+    return sizes
+
+
+# Compiled lazily on first call, i.e. only once a column is long enough to use it
+_missing_block_sizes_jit = njit(cache=True)(_missing_block_sizes_loop) if njit is not None else None
+
+
+def _missing_block_sizes(is_missing: np.ndarray) -> np.ndarray:
+    """Block sizes via the NumPy version, or the JIT-compiled loop for long columns when numba is installed"""
+    if _missing_block_sizes_jit is not None and is_missing.shape[0] >= NUMBA_MIN_ROWS:
+        return _missing_block_sizes_jit(is_missing)
+    return _missing_block_sizes_numpy(is_missing)
+
+
 class DataCleaner:
     """Data cleaning utility class"""
     
@@ -24,22 +80,26 @@ class DataCleaner:
         Returns:
             Dictionary of missing data statistics
         """
-        missing_stats = {}
-        for col in df.columns:
-            missing_count = df[col].isna().sum()
-            missing_pct = (missing_count / len(df)) * 100
-            if missing_count > 0:
-                missing_stats[col] = {
-                    'count': missing_count,
-                    'percentage': round(missing_pct, 2)
-                }
+        missing_counts = df.isna().sum(axis=0)
+        missing_counts = missing_counts[missing_counts > 0]
+        missing_pcts = missing_counts / len(df) * 100
+        
+        missing_stats = {
+            col: {
+                'count': int(missing_counts[col]),
+                'percentage': round(float(missing_pcts[col]), 2)
+            }
+            for col in missing_counts.index
+        }
         
         return missing_stats
     
     @staticmethod
     def interpolate_missing(df: pd.DataFrame, 
                            max_gap_hours: int = 3,
-                           method: str = 'linear') -> pd.DataFrame:
+                           method: str = 'linear',
+                           numeric_cols: list = None,
+                           copy: bool = False) -> pd.DataFrame:
         """
         Interpolate and fill missing data
         
@@ -47,41 +107,72 @@ class DataCleaner:
             df: Input DataFrame
             max_gap_hours: Maximum allowed consecutive missing hours for interpolation
             method: Interpolation method ('linear', 'time', 'polynomial')
+            numeric_cols: Numeric columns to fill (detected from dtypes if not provided)
+            copy: Deep-copy the input first (otherwise unchanged columns share its data;
+                the input itself is never modified, only whole columns are replaced)
             
         Returns:
             Filled DataFrame
         """
-        df = df.copy()
+        df = df.copy(deep=copy)
+        
+        if numeric_cols is None:
+            numeric_cols = df.select_dtypes(include='number').columns
+        numeric_cols = list(numeric_cols)
+        
+        # Only columns that actually contain gaps need filling
+        numeric_df = df[numeric_cols]
+        missing_mask = numeric_df.isna()
+        missing_cols = numeric_df.columns[missing_mask.any()].tolist()
+        if not missing_cols:
+            return df
         
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        # Work on one 2-D array (float32 if every column allows it);
+        # interpolate and forward-fill each gappy column once, then pick per row
+        gappy_df = numeric_df[missing_cols]
+        work_dtype = np.result_type(np.float32, *gappy_df.dtypes)
+        values = gappy_df.to_numpy(dtype=work_dtype, copy=True)
+        interpolated = gappy_df.interpolate(method=method).to_numpy(dtype=work_dtype)
+        forward_filled = gappy_df.ffill().to_numpy(dtype=work_dtype)
+        missing = missing_mask[missing_cols].to_numpy()
         
-        for col in numeric_cols:
-            # Identify missing value blocks
-            is_missing = df[col].isna()
-            missing_blocks = (is_missing != is_missing.shift()).cumsum()
+        for i, col in enumerate(missing_cols):
+            is_missing = missing[:, i]
             
-            for block_id in missing_blocks[is_missing].unique():
-                block_mask = (missing_blocks == block_id) & is_missing
-                block_size = block_mask.sum()
-                
-                if block_size <= max_gap_hours:
-                    # Small gaps: use interpolation
-                    df.loc[block_mask, col] = df[col].interpolate(method=method)[block_mask]
-                    logger.info(f"{col}: Interpolated {block_size} missing values")
-                else:
-                    # Large gaps: use forward fill
-                    df.loc[block_mask, col] = df[col].ffill()[block_mask]
-                    logger.warning(f"{col}: Consecutive {block_size} hours missing, using forward fill")
-        
-        # Finally handle remaining missing values (e.g., at the beginning)
-        df = df.bfill().ffill()
+            # Size of the consecutive missing block each row belongs to
+            sizes_per_row = _missing_block_sizes(is_missing)
+            
+            # Small gaps: use interpolation; large gaps: use forward fill
+            small_gap = is_missing & (sizes_per_row <= max_gap_hours)
+            large_gap = is_missing & ~small_gap
+            values[:, i] = np.where(
+                small_gap,
+                interpolated[:, i],
+                np.where(large_gap, forward_filled[:, i], values[:, i])
+            )
+            
+            if logger.isEnabledFor(logging.INFO):
+                n_interpolated = int(small_gap.sum())
+                if n_interpolated > 0:
+                    logger.info("%s: Interpolated %d missing values", col, n_interpolated)
+            if logger.isEnabledFor(logging.WARNING) and large_gap.any():
+                longest_gap = int(sizes_per_row[large_gap].max())
+                logger.warning("%s: Consecutive %d hours missing, using forward fill", col, longest_gap)
+        
+        # Finally handle remaining missing values (e.g., at the beginning) in the same array;
+        # linear interpolation extends the nearest valid value past the edges
+        filled = pd.DataFrame(values, index=df.index, columns=missing_cols)
+        filled = filled.interpolate(method='linear', limit_direction='both')
+        # Write back once, keeping each column's original (float) dtype
+        df[missing_cols] = filled.astype(df.dtypes[missing_cols].to_dict())
         
         return df
     
     @staticmethod
     def remove_outliers(df: pd.DataFrame, 
                        columns: list,
-                       n_std: float = 4.0) -> pd.DataFrame:
+                       n_std: float = 4.0,
+                       copy: bool = False) -> pd.DataFrame:
         """
         Remove outliers (based on standard deviation)
         
@@ -89,27 +180,37 @@ class DataCleaner:
             df: Input DataFrame
             columns: List of column names to check
             n_std: Standard deviation multiplier threshold
+            copy: Deep-copy the input first (otherwise unchanged columns share its data;
+                the input itself is never modified, only whole columns are replaced)
             
         Returns:
             Processed DataFrame
         """
-        df = df.copy()
+        df = df.copy(deep=copy)
+        
+        columns = [col for col in columns if col in df.columns]
+        if not columns:
+            return df
         
-        for col in columns:
-            if col in df.columns:
-                mean = df[col].mean()
-                std = df[col].std()
-                
-                lower_bound = mean - n_std * std
-                upper_bound = mean + n_std * std
-                
-                outliers = (df[col] < lower_bound) | (df[col] > upper_bound)
-                n_outliers = outliers.sum()
-                
-                if n_outliers > 0:
-                    logger.info(f"{col}: Found {n_outliers} outliers, will replace with boundary values")
-                    df.loc[df[col] < lower_bound, col] = lower_bound
-                    df.loc[df[col] > upper_bound, col] = upper_bound
+        values = df[columns]
+        mean = values.mean()
+        std = values.std()
+        
+        lower_bound = mean - n_std * std
+        upper_bound = mean + n_std * std
+        
+        outliers = (values.lt(lower_bound, axis=1) | values.gt(upper_bound, axis=1)).sum()
+        outlier_cols = outliers.index[outliers > 0]
+        
+        if len(outlier_cols) > 0:
+            for col in outlier_cols:
+                logger.info("%s: Found %d outliers, will replace with boundary values", col, outliers[col])
+            # Only touch columns with outliers so untouched columns keep their dtype
+            df[outlier_cols] = values[outlier_cols].clip(
+                lower=lower_bound[outlier_cols],
+                upper=upper_bound[outlier_cols],
+                axis=1
+            )
         
         return df
     
@@ -117,7 +218,8 @@ class DataCleaner:
     def validate_price_range(df: pd.DataFrame, 
                             price_col: str = 'price',
                             min_price: float = -500,
-                            max_price: float = 1000) -> pd.DataFrame:
+                            max_price: float = 1000,
+                            copy: bool = False) -> pd.DataFrame:
         """
         Validate price range (European market may have negative prices)
         
@@ -126,56 +228,60 @@ class DataCleaner:
             price_col: Price column name
             min_price: Minimum reasonable price (EUR/MWh)
             max_price: Maximum reasonable price (EUR/MWh)
+            copy: Deep-copy the input first (otherwise unchanged columns share its data;
+                the input itself is never modified, only whole columns are replaced)
             
         Returns:
             Validated DataFrame
         """
-        df = df.copy()
+        df = df.copy(deep=copy)
         
         if price_col in df.columns:
-            invalid_prices = (df[price_col] < min_price) | (df[price_col] > max_price)
-            n_invalid = invalid_prices.sum()
+            prices = df[price_col]
+            valid_prices = prices.between(min_price, max_price)
             
-            if n_invalid > 0:
-                logger.warning(f"Found {n_invalid} prices out of reasonable range")
-                # Replace with NaN, will be handled with interpolation later
-                df.loc[invalid_prices, price_col] = np.nan
+            if logger.isEnabledFor(logging.WARNING):
+                n_invalid = int((prices.notna() & ~valid_prices).sum())
+                if n_invalid > 0:
+                    logger.warning("Found %d prices out of reasonable range", n_invalid)
+            
+            # Replace with NaN, will be handled with interpolation later
+            df[price_col] = prices.where(valid_prices)
         
         return df
     
     @staticmethod
     def ensure_hourly_continuity(df: pd.DataFrame, 
-                                 timestamp_col: str = 'timestamp') -> pd.DataFrame:
+                                 timestamp_col: str = 'timestamp',
+                                 copy: bool = False) -> pd.DataFrame:
         """
         Ensure hourly continuity of time series, fill missing hours
         
         Args:
             df: Input DataFrame
             timestamp_col: Timestamp column name
+            copy: Deep-copy the input first (otherwise unchanged columns share its data;
+                the input itself is never modified, only whole columns are replaced)
             
         Returns:
             Continuous DataFrame
         """
-        df = df.copy()
-        df[timestamp_col] = pd.to_datetime(df[timestamp_col])
-        df = df.sort_values(timestamp_col)
-        
-        # Create complete hourly index
-        full_range = pd.date_range(
-            start=df[timestamp_col].min(),
-            end=df[timestamp_col].max(),
-            freq='h'  # lowercase h (uppercase H is deprecated)
-        )
-        
-        # Reindex
+        n_rows = len(df)
+        df = df.copy(deep=copy)
+        if not pd.api.types.is_datetime64_any_dtype(df[timestamp_col]):
+            df[timestamp_col] = pd.to_datetime(df[timestamp_col])
         df = df.set_index(timestamp_col)
-        df = df.reindex(full_range)
-        df.index.name = timestamp_col
-        df = df.reset_index()
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
         
-        missing_hours = df.isna().any(axis=1).sum()
+        # Conform to a complete hourly index in one step
+        df = df.asfreq('h')  # lowercase h (uppercase H is deprecated)
+        df = df.rename_axis(timestamp_col).reset_index()
+        
+        # Inserted hours follow from the row counts, no extra pass over the data
+        missing_hours = len(df) - n_rows
         if missing_hours > 0:
-            logger.info(f"Filled {missing_hours} missing time points")
+            logger.info("Filled %d missing time points", missing_hours)
         
         return df
     
@@ -192,24 +298,33 @@ class DataCleaner:
         """
         logger.info("Starting data cleaning pipeline...")
         
+        # One defensive copy up front; the steps below only replace whole columns of it
+        df = df.copy()
+        
         # 1. Ensure time continuity
         df = DataCleaner.ensure_hourly_continuity(df)
         
+        # Numeric columns are fixed from here on, detect them once
+        numeric_cols = list(df.select_dtypes(include='number').columns)
+        
         # 2. Check missing data
         missing_stats = DataCleaner.check_missing_data(df)
         if missing_stats:
-            logger.info(f"Missing data statistics: {missing_stats}")
+            logger.info("Missing data statistics: %s", missing_stats)
         
-        # 3. Price range validation
+        # 3. Price range validation (out-of-range prices become NaN)
+        needs_fill = bool(missing_stats)
         if 'price' in df.columns:
             df = DataCleaner.validate_price_range(df)
+            needs_fill = needs_fill or df['price'].isna().any()
         
-        # 4. Interpolate and fill
-        df = DataCleaner.interpolate_missing(df, max_gap_hours=MAX_MISSING_HOURS)
+        # 4. Interpolate and fill (skipped when the data has no gaps)
+        if needs_fill:
+            df = DataCleaner.interpolate_missing(df, max_gap_hours=MAX_MISSING_HOURS,
+                                                 numeric_cols=numeric_cols)
         
         # 5. Remove outliers (except price, which may reasonably be extreme)
-        outlier_cols = [col for col in df.columns 
-                       if col not in ['timestamp', 'price'] and df[col].dtype in [np.float64, np.int64]]
+        outlier_cols = [col for col in numeric_cols if col != 'price']
         if outlier_cols:
             df = DataCleaner.remove_outliers(df, outlier_cols)
         
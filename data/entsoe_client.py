@@ -1,45 +1,690 @@
 """
 ENTSO-E data client
 """
-from entsoe import EntsoePandasClient
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import deque
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from config.settings import ENTSOE_API_KEY, BIDDING_ZONE, TIMEZONE
-import time
-from tenacity import retry, wait_exponential, stop_after_attempt
+from config.settings import ENTSOE_API_KEY, ENTSOE_ENABLE_FALLBACK, BIDDING_ZONE, TIMEZONE, NUMBA_MIN_ROWS
+from data.cache import read_cached, write_cached
+from tenacity import retry, retry_if_exception_type, wait_random_exponential, stop_after_attempt
 import logging
+import hashlib
+from pathlib import Path
+from functools import lru_cache, wraps
+from typing import NamedTuple
+
+try:
+    from lxml import etree
+    # ENTSO-E documents need no DTD entities, ID lookups, network access or whitespace-only nodes
+    _PARSER_OPTIONS = dict(collect_ids=False, resolve_entities=False, no_network=True,
+                           huge_tree=False, remove_blank_text=True)
+except ImportError:  # lxml is optional, fall back to the (slower) stdlib parser
+    from xml.etree import ElementTree as etree
+    _PARSER_OPTIONS = {}
+_HAS_XPATH = hasattr(etree, 'XPath')
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, fall back to the NumPy gap fill
+    njit = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ENTSO-E REST API endpoint
+ENTSOE_API_URL = "https://web-api.tp.entsoe.eu/api"
+
+# Ranges longer than this are split into calendar-month chunks fetched concurrently
+# (ENTSO-E serves at most one year per request, and small responses come back faster)
+CHUNKING_THRESHOLD = pd.Timedelta(days=31)
+# On-disk parquet cache of fetched data: ranges that ended CACHE_SETTLE_TIME ago never expire,
+# more recent ones (ENTSO-E may still revise them) expire after a TTL matching their update cadence
+MARKET_CACHE_DIR = Path("data/local_cache/entsoe")
+CACHE_FORMAT_VERSION = 2  # part of the cache key; bump when the cached columns/dtypes change
+CACHE_SETTLE_TIME = pd.Timedelta(days=2)
+RECENT_CACHE_TTL = {
+    'day_ahead_prices': pd.Timedelta(hours=1),
+    'load_forecast': pd.Timedelta(minutes=30),
+    'wind_solar_forecast': pd.Timedelta(minutes=30),
+    'market': pd.Timedelta(minutes=30),
+}
+
+# Chunk concurrency adapts AIMD-style: +1 per successful chunk, halved on a rate-limit response.
+# The limit is client-wide: the three concurrent chunked fetches of fetch_all_market_data share it
+INITIAL_CHUNK_CONCURRENCY = 2
+MAX_CHUNK_CONCURRENCY = 8
+MAX_CHUNK_ATTEMPTS = 3
+# A rate-limited window is resubmitted after Retry-After, or else an exponential backoff
+RATE_LIMIT_BASE_DELAY = 1.0
+RATE_LIMIT_MAX_DELAY = 60.0
+
+# XML namespaces of ENTSO-E documents
+NS_PUBLICATION = 'urn:iec62325.351:tc57wg16:451-3:publicationdocument:7:3'
+NS_GENERATION_LOAD = 'urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0'
+
+
+class _DocumentTags(NamedTuple):
+    """Namespace-qualified ('{uri}name') tags and paths of one ENTSO-E document namespace"""
+    time_series: str
+    period: str
+    start: str
+    resolution: str
+    point: str
+    position: str
+    price: str
+    quantity: str
+    psr_type: str
+    psr_type_tag: str
+
+
+def _qualified_tags(ns_uri: str) -> _DocumentTags:
+    """
+    Precompute qualified tag names so find/iter calls skip prefix resolution
+    
+    Args:
+        ns_uri: Namespace URI ('' for documents without namespace)
+        
+    Returns:
+        _DocumentTags with '{uri}name' tags and paths
+    """
+    prefix = f'{{{ns_uri}}}' if ns_uri else ''
+    return _DocumentTags(
+        time_series=f'{prefix}TimeSeries',
+        period=f'{prefix}Period',
+        start=f'{prefix}timeInterval/{prefix}start',
+        resolution=f'{prefix}resolution',
+        point=f'{prefix}Point',
+        position=f'{prefix}position',
+        price=f'{prefix}price.amount',
+        quantity=f'{prefix}quantity',
+        psr_type=f'.//{prefix}MktPSRType/{prefix}psrType',
+        psr_type_tag=f'{prefix}psrType',
+    )
+
+
+def _namespace_uri(tag: str) -> str:
+    """
+    Namespace URI of a qualified '{uri}name' tag ('' if unqualified)
+    
+    Args:
+        tag: Element tag, e.g. root.tag
+        
+    Returns:
+        Namespace URI
+    """
+    return tag[1:tag.index('}')] if tag.startswith('{') else ''
+
+
+@lru_cache(maxsize=None)
+def _point_xpaths(ns_uri: str, value_name: str) -> tuple:
+    """
+    Compiled XPath expressions collecting a Period's Point count, positions and values (lxml only)
+    
+    Args:
+        ns_uri: Namespace URI ('' for documents without namespace)
+        value_name: Local name of the value element ('price.amount' or 'quantity')
+        
+    Returns:
+        (count, positions, values) XPath objects
+    """
+    prefix = 'ns:' if ns_uri else ''
+    namespaces = {'ns': ns_uri} if ns_uri else None
+    return (
+        etree.XPath(f'count({prefix}Point)', namespaces=namespaces),
+        etree.XPath(f'{prefix}Point/{prefix}position/text()', namespaces=namespaces),
+        etree.XPath(f'{prefix}Point/{prefix}{value_name}/text()', namespaces=namespaces),
+    )
+
+
+def _point_arrays(period, tags: _DocumentTags, value_tag: str) -> tuple:
+    """
+    Positions and values of a Period's Points as arrays, skipping incomplete Points
+    
+    With lxml, all text nodes are collected by two XPath walks and converted by NumPy in one go;
+    otherwise (or if some Point lacks a field) each Point is read individually.
+    
+    Args:
+        period: Period element
+        tags: Qualified tags of the document
+        value_tag: Qualified tag of the value element (tags.price or tags.quantity)
+        
+    Returns:
+        (positions, values) as int64 and float64 arrays
+    """
+    if _HAS_XPATH:
+        count_xpath, positions_xpath, values_xpath = _point_xpaths(
+            _namespace_uri(tags.point), value_tag.rpartition('}')[2]
+        )
+        n_points = int(count_xpath(period))
+        position_texts = positions_xpath(period)
+        value_texts = values_xpath(period)
+        if len(position_texts) == n_points and len(value_texts) == n_points:
+            return np.asarray(position_texts, dtype=np.int64), np.asarray(value_texts, dtype=np.float64)
+    
+    point_texts = [
+        (point.findtext(tags.position), point.findtext(value_tag))
+        for point in period.iter(tags.point)
+    ]
+    point_texts = [(pos, val) for pos, val in point_texts if pos is not None and val is not None]
+    positions = np.asarray([pos for pos, _ in point_texts], dtype=np.int64)
+    values = np.asarray([val for _, val in point_texts], dtype=np.float64)
+    return positions, values
+
+
+PUBLICATION_TAGS = _qualified_tags(NS_PUBLICATION)
+GENERATION_LOAD_TAGS = _qualified_tags(NS_GENERATION_LOAD)
+
+
+def _iter_periods(source, tags: _DocumentTags = None):
+    """
+    Incrementally parse an ENTSO-E document and yield its Period elements,
+    clearing each TimeSeries once consumed so memory stays bounded
+    
+    Args:
+        source: File-like XML body (e.g. a streamed response.raw)
+        tags: Qualified tags of the document (detected from the root namespace if not provided)
+        
+    Yields:
+        (period, psr_type) tuples, psr_type being the enclosing TimeSeries' psrType (None if absent)
+    """
+    events = etree.iterparse(source, events=('start', 'end'), **_PARSER_OPTIONS)
+    if tags is None:
+        _, root = next(events)
+        tags = _qualified_tags(_namespace_uri(root.tag))
+    
+    psr_type = None
+    for event, elem in events:
+        if event != 'end':
+            continue
+        if elem.tag == tags.period:
+            yield elem, psr_type
+        elif elem.tag == tags.psr_type_tag:
+            psr_type = elem.text
+        elif elem.tag == tags.time_series:
+            psr_type = None
+            elem.clear()
+            if _HAS_XPATH:
+                # lxml: also detach the consumed siblings, else their empty shells pile up under the root
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+
+
+# Retry configuration: transient HTTP failures (rate limits, 5xx) are retried by urllib3
+# inside the connection adapter, honoring Retry-After, before any response is parsed.
+# Connection/read errors are left to the tenacity retry below, so the two layers don't
+# multiply into dozens of attempts per request
+RATE_LIMIT_STATUS_CODES = (429, 503)
+HTTP_RETRY = Retry(
+    total=5,
+    connect=0,
+    read=0,
+    other=0,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=('GET',),
+    respect_retry_after_header=True,
+    raise_on_status=False,  # hand the last response to raise_for_status() once retries run out
+)
+# Chunk windows leave 429/503 to the AIMD controller in _fetch_chunked, which has to see the
+# first rate-limit response to back off (the adapter would otherwise absorb it in its retries)
+CHUNK_HTTP_RETRY = HTTP_RETRY.new(status_forcelist=(500, 502, 504))
+# Python-level retries only for network failures (connection errors, timeouts, and streamed
+# bodies cut off mid-download, which the adapter-level Retry never sees); HTTP 5xx responses
+# are already retried by HTTP_RETRY, so HTTPError and parse errors fail fast.
+# The XML is parsed straight from response.raw, so errors while reading the body surface as
+# raw urllib3 exceptions rather than the requests wrappers
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ProtocolError,
+    ReadTimeoutError,
+)
+_JITTER_WAIT = wait_random_exponential(multiplier=0.5, max=20)
+
+# DataFrame.attrs key flagging fetch results that are missing data; these are never cached
+INCOMPLETE_ATTR = 'incomplete'
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """Whether an exception is an HTTP 429/503 response (retrying elsewhere would not help)"""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in RATE_LIMIT_STATUS_CODES
+
+
+def _rate_limit_delay(error: Exception, attempt: int) -> float:
+    """
+    Seconds to wait before resubmitting a rate-limited chunk window
+    
+    Args:
+        error: The rate-limit HTTPError
+        attempt: Number of times the window has been tried so far
+        
+    Returns:
+        The response's Retry-After (seconds or HTTP date), else a jittered exponential
+        backoff; at most RATE_LIMIT_MAX_DELAY
+    """
+    retry_after = error.response.headers.get('Retry-After')
+    if retry_after:
+        try:
+            return min(HTTP_RETRY.parse_retry_after(retry_after), RATE_LIMIT_MAX_DELAY)
+        except InvalidHeader:
+            pass
+    backoff = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** (attempt - 1))
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def _date_chunks(start: pd.Timestamp, end: pd.Timestamp, freq: str = 'MS') -> list:
+    """
+    Split [start, end) into consecutive windows at calendar boundaries
+    
+    Args:
+        start: Start time
+        end: End time
+        freq: Boundary frequency (default: month starts)
+        
+    Returns:
+        List of (window_start, window_end) tuples covering the range in order
+    """
+    boundaries = pd.date_range(start, end, freq=freq)
+    edges = [start, *boundaries[(boundaries > start) & (boundaries < end)], end]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _mark_incomplete(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flag a fetch result as missing data (e.g. skipped chunk windows), so it is returned but never cached
+    
+    Args:
+        df: Fetch result
+        
+    Returns:
+        The same DataFrame, flagged in its attrs
+    """
+    df.attrs[INCOMPLETE_ATTR] = True
+    return df
+
+
+def _is_complete(df: pd.DataFrame) -> bool:
+    """Whether a fetch result may be cached (not flagged by _mark_incomplete)"""
+    return not df.attrs.get(INCOMPLETE_ATTR, False)
+
+
+def _result_or_empty(future, columns: list, name: str) -> pd.DataFrame:
+    """
+    Result of a fetch future, or an empty DataFrame with the expected columns if it failed
+    (flagged incomplete, so the degraded merge is not cached)
+    
+    Args:
+        future: Future of a fetch_* call
+        columns: Columns of the empty placeholder DataFrame
+        name: Data name for logging
+        
+    Returns:
+        Fetched or empty DataFrame
+    """
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"⚠️  获取{name}失败，使用空数据继续: {e}")
+        return _mark_incomplete(pd.DataFrame(columns=columns))
+
+
+def _dedupe_sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop duplicate timestamps (keeping the first occurrence) and sort, in one np.unique pass
+    
+    Args:
+        df: DataFrame with a 'timestamp' column
+        
+    Returns:
+        Deduplicated DataFrame sorted by timestamp, with a fresh RangeIndex
+    """
+    # For tz-aware columns .values is the UTC datetime64[ns] buffer, which orders the same way
+    _, first_idx = np.unique(df['timestamp'].values, return_index=True)
+    if len(first_idx) == len(df) and (first_idx[1:] > first_idx[:-1]).all():
+        return df.reset_index(drop=True)
+    return df.iloc[first_idx].reset_index(drop=True)
+
+
+def _ffill_bfill_columns(values: np.ndarray) -> None:
+    """
+    In-place forward fill, then backward fill of leading NaNs, one column at a time (JIT target)
+    
+    Same result as DataFrame.ffill().bfill() without the intermediate frames.
+    
+    Args:
+        values: 2-D float array (Fortran order keeps each column contiguous)
+    """
+    n_rows, n_cols = values.shape
+    for j in range(n_cols):
+        first_valid = -1
+        last = np.nan
+        for i in range(n_rows):
+            if np.isnan(values[i, j]):
+                values[i, j] = last
+            else:
+                last = values[i, j]
+                if first_valid < 0:
+                    first_valid = i
+        if first_valid > 0:
+            values[:first_valid, j] = values[first_valid, j]
+
+
+def _ffill_bfill_numpy(values: np.ndarray) -> None:
+    """
+    In-place forward fill, then backward fill of leading NaNs, on the whole array at once (NumPy version)
+    
+    Same result as DataFrame.ffill().bfill() without the intermediate frames.
+    
+    Args:
+        values: 2-D float array
+    """
+    missing = np.isnan(values)
+    # Row of the last valid value at or above each cell (0 before the first valid one)
+    last_valid = np.where(missing, 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    filled = np.take_along_axis(values, last_valid, axis=0)
+    # Only the leading gaps are still NaN: take the first valid value of the column
+    first_valid = values[missing.argmin(axis=0), np.arange(values.shape[1])]
+    values[...] = np.where(np.isnan(filled), first_valid, filled)
+
+
+# Compiled lazily on first call, i.e. only once a merge is long enough to use it
+_ffill_bfill_jit = njit(cache=True)(_ffill_bfill_columns) if njit is not None else None
+
+
+def _ffill_bfill_kernel(values: np.ndarray) -> None:
+    """In-place gap fill via the NumPy version, or the JIT-compiled loop for long frames when numba is installed"""
+    if _ffill_bfill_jit is not None and values.shape[0] >= NUMBA_MIN_ROWS:
+        _ffill_bfill_jit(values)
+    else:
+        _ffill_bfill_numpy(values)
+
+
+def _cache_path(name: str, bidding_zone: str, start: pd.Timestamp, end: pd.Timestamp) -> Path:
+    """Parquet cache file of one (data name, bidding zone, start, end) query"""
+    key = hashlib.blake2b(
+        f"{CACHE_FORMAT_VERSION}|{name}|{bidding_zone}|{start.isoformat()}|{end.isoformat()}".encode()
+    ).hexdigest()[:16]
+    return MARKET_CACHE_DIR / f"{name}_{key}.parquet"
+
+
+def _cache_max_age(name: str, end: pd.Timestamp):
+    """
+    How long a cached query stays valid
+    
+    Args:
+        name: Cached data name (a RECENT_CACHE_TTL key)
+        end: End of the queried range
+        
+    Returns:
+        None for settled ranges (no expiry), otherwise the recent-data TTL
+    """
+    if end <= pd.Timestamp.now(tz=TIMEZONE) - CACHE_SETTLE_TIME:
+        return None
+    return RECENT_CACHE_TTL[name]
+
+
+def _disk_cached(name: str):
+    """
+    Decorator for fetch methods taking (start, end): serve queries from the parquet cache
+    while it is valid (see _cache_max_age)
+    
+    Empty results (the fetchers' failure fallbacks) and results flagged by _mark_incomplete
+    are never cached.
+    
+    Args:
+        name: Cached data name (a RECENT_CACHE_TTL key)
+    """
+    def decorator(fetch_fn):
+        @wraps(fetch_fn)
+        def wrapper(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+            if not self.use_cache:
+                return fetch_fn(self, start, end)
+            
+            path = _cache_path(name, self.bidding_zone, start, end)
+            df = read_cached(path, _cache_max_age(name, end))
+            if df is None:
+                df = fetch_fn(self, start, end)
+                if not df.empty and _is_complete(df):
+                    write_cached(path, df)
+            return df
+        
+        return wrapper
+    
+    return decorator
+
+
+def _utc_ns(timestamp_str: str) -> int:
+    """UTC epoch nanoseconds of an ENTSO-E UTC timestamp string (format: 2026-01-04T23:00Z)"""
+    return int(np.datetime64(timestamp_str.rstrip('Z'), 'ns').astype(np.int64))
+
+
+def _to_local_timestamps(timestamps_ns: list) -> pd.DatetimeIndex:
+    """
+    Concatenate per-Period UTC epoch-nanosecond arrays into one local DatetimeIndex
+    
+    Args:
+        timestamps_ns: List of int64 arrays (UTC nanoseconds since epoch)
+        
+    Returns:
+        tz-aware DatetimeIndex in the configured timezone
+    """
+    all_ns = np.concatenate(timestamps_ns) if timestamps_ns else np.empty(0, dtype=np.int64)
+    return pd.to_datetime(all_ns, unit='ns', utc=True).tz_convert(TIMEZONE)
+
+
+def _unique_points(timestamps_ns: list, values: list, dtype=np.float32) -> tuple:
+    """
+    Concatenate per-Period arrays, keeping the first point of each timestamp, sorted by time
+    
+    Deduplicates on the int64 nanoseconds (one np.unique pass) before any Timestamp is built.
+    
+    Args:
+        timestamps_ns: List of int64 arrays (UTC nanoseconds since epoch)
+        values: List of value arrays matching timestamps_ns
+        dtype: dtype of the returned values
+        
+    Returns:
+        (tz-aware local DatetimeIndex, values)
+    """
+    all_ns = np.concatenate(timestamps_ns) if timestamps_ns else np.empty(0, dtype=np.int64)
+    all_values = np.concatenate(values).astype(dtype) if values else np.empty(0, dtype=dtype)
+    unique_ns, first_idx = np.unique(all_ns, return_index=True)
+    return _to_local_timestamps([unique_ns]), all_values[first_idx]
+
 
 class ENTSOEClient:
     """ENTSO-E Transparency Platform data client"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_cache: bool = True, enable_fallback: bool = None):
         """
         Initialize the ENTSO-E client
         
         Args:
             api_key: ENTSO-E API key. If not provided, read from environment/config
+            use_cache: Whether queries are served from the parquet cache (False bypasses it)
+            enable_fallback: Whether a failed raw API call is retried through entsoe-py.
+                If not provided, read from environment/config (ENTSOE_ENABLE_FALLBACK)
         """
         self.api_key = api_key or ENTSOE_API_KEY
         if not self.api_key:
             raise ValueError("ENTSO-E API key未设置,请在.env文件中配置ENTSOE_API_KEY")
         
-        self.client = EntsoePandasClient(api_key=self.api_key)
         self.bidding_zone = BIDDING_ZONE
+        self.use_cache = use_cache
+        self.enable_fallback = ENTSOE_ENABLE_FALLBACK if enable_fallback is None else enable_fallback
         
-    def _fetch_prices_raw_api(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        # entsoe-py client, only needed by the fallback paths: created on first use
+        self._client = None
+        self._client_lock = threading.Lock()
+        
+        # Shared HTTP session so TCP/TLS connections to the API are reused across requests;
+        # sized for the chunk windows in flight (fallback queries from chunk workers use it too)
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(
+            max_retries=HTTP_RETRY, pool_connections=4, pool_maxsize=MAX_CHUNK_CONCURRENCY
+        ))
+        # Chunk windows use a session whose adapter does not retry rate limits (see CHUNK_HTTP_RETRY);
+        # _fetch_chunked's workers select it through a thread-local flag
+        self._chunk_session = requests.Session()
+        self._chunk_session.mount('https://', HTTPAdapter(
+            max_retries=CHUNK_HTTP_RETRY, pool_connections=4, pool_maxsize=MAX_CHUNK_CONCURRENCY
+        ))
+        self._local = threading.local()
+        
+        # Client-wide AIMD limit on chunk requests in flight, shared by all of this client's fetches
+        self._concurrency = float(INITIAL_CHUNK_CONCURRENCY)
+        self._in_flight = 0
+        self._slots = threading.Condition()
+        
+    @property
+    def client(self):
+        """entsoe-py client (imported and created lazily, the raw API path does not need it)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from entsoe import EntsoePandasClient
+                    # Reuse the pooled, retrying session so the fallback shares its keep-alive connections
+                    self._client = EntsoePandasClient(api_key=self.api_key, session=self._session, timeout=30)
+        return self._client
+    
+    @property
+    def _request_session(self) -> requests.Session:
+        """HTTP session for a raw API request (the chunk session inside _fetch_chunked's workers)"""
+        return self._chunk_session if getattr(self._local, 'chunked', False) else self._session
+    
+    def _acquire_chunk_slot(self, block: bool) -> bool:
         """
-        直接调用 ENTSO-E REST API，绕过 entsoe-py 的解析 bug
+        Reserve one of the client-wide chunk request slots (at most the current AIMD concurrency)
+        
+        Args:
+            block: Wait until a slot frees up instead of giving up
+            
+        Returns:
+            Whether a slot was reserved
+        """
+        with self._slots:
+            while self._in_flight >= int(self._concurrency):
+                if not block:
+                    return False
+                self._slots.wait()
+            self._in_flight += 1
+            return True
+    
+    def _release_chunk_slot(self) -> None:
+        """Free a chunk request slot and wake fetches waiting for one"""
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+    
+    def _run_chunk(self, fetch_fn, window: tuple, delay: float) -> pd.DataFrame:
         """
-        import requests
-        from xml.etree import ElementTree as ET
+        Worker of _fetch_chunked: wait out a rate-limit backoff, then fetch one window on the
+        chunk session; the window's slot stays reserved until it is done
         
-        # ENTSO-E API endpoint
-        url = "https://web-api.tp.entsoe.eu/api"
+        Args:
+            fetch_fn: Fetch method taking (start, end)
+            window: (start, end) of the window
+            delay: Seconds to wait first (0 for a first attempt)
+            
+        Returns:
+            The window's DataFrame
+        """
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            self._local.chunked = True
+            return fetch_fn(*window)
+        finally:
+            self._local.chunked = False
+            self._release_chunk_slot()
+    
+    def _fetch_chunked(self, fetch_fn, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Split a long date range into month windows, fetch them concurrently and concatenate once
         
+        Args:
+            fetch_fn: Fetch method taking (start, end) and returning a DataFrame with a 'timestamp' column
+            start: Start time
+            end: End time
+            
+        Returns:
+            Concatenated DataFrame, deduplicated and sorted by timestamp
+            (failed windows are skipped and the result is flagged incomplete;
+            raises only if every window failed)
+        """
+        windows = _date_chunks(start, end)
+        
+        logger.info(f"  📦 时间范围超过 {CHUNKING_THRESHOLD.days} 天，拆分为 {len(windows)} 个请求")
+        pending = deque((window, 0.0) for window in windows)
+        attempts = dict.fromkeys(windows, 0)
+        results = {}
+        errors = []
+        running = {}
+        with ThreadPoolExecutor(max_workers=MAX_CHUNK_CONCURRENCY) as executor:
+            while pending or running:
+                # Only keep as many requests in flight as the client-wide concurrency allows; wait for
+                # a slot only when none of this fetch's requests is running (other fetches hold them all)
+                while pending and self._acquire_chunk_slot(block=not running):
+                    window, delay = pending.popleft()
+                    attempts[window] += 1
+                    running[executor.submit(self._run_chunk, fetch_fn, window, delay)] = window
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = running.pop(future)
+                    try:
+                        results[window] = future.result()
+                    except Exception as e:
+                        if not _is_rate_limited(e) or attempts[window] >= MAX_CHUNK_ATTEMPTS:
+                            # Skip this window, the others may still succeed
+                            logger.warning(f"  ⚠️  {window[0]} 到 {window[1]} 获取失败，跳过: {e}")
+                            errors.append(e)
+                            continue
+                        # Multiplicative decrease, then requeue the window behind a backoff
+                        with self._slots:
+                            self._concurrency = max(1.0, self._concurrency * 0.5)
+                        delay = _rate_limit_delay(e, attempts[window])
+                        logger.warning(f"  ⚠️  请求被限流，并发降至 {int(self._concurrency)}，{delay:.1f} 秒后重试")
+                        pending.append((window, delay))
+                        continue
+                    # Additive increase
+                    with self._slots:
+                        self._concurrency = min(float(MAX_CHUNK_CONCURRENCY), self._concurrency + 1)
+                        self._slots.notify_all()
+        
+        if not results:
+            raise errors[0]
+        frames = [results[window] for window in windows if window in results]
+        
+        # Empty placeholder frames (failed chunks) would turn the columns into object dtype
+        non_empty = [frame for frame in frames if not frame.empty]
+        if not non_empty:
+            df = frames[0]
+        else:
+            df = _dedupe_sorted(pd.concat(non_empty, ignore_index=True))
+        
+        if errors:
+            # A month is missing: return what was fetched, but keep it out of the caches
+            logger.warning(f"  ⚠️  {len(errors)}/{len(windows)} 个时间窗口获取失败，结果不完整，不写入缓存")
+            _mark_incomplete(df)
+        return df
+    
+    def _fetch_prices_raw_api(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        直接调用 ENTSO-E REST API，绕过 entsoe-py 的解析 bug
+        """
         # API parameters
         params = {
             'securityToken': self.api_key,
@@ -51,27 +696,24 @@ class ENTSOEClient:
         }
         
         logger.info(f"  直接调用 ENTSO-E REST API...")
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
+        tags = PUBLICATION_TAGS
         
-        # Parse XML
-        root = ET.fromstring(response.content)
-        
-        # Extract time series data
-        ns = {'ns': 'urn:iec62325.351:tc57wg16:451-3:publicationdocument:7:3'}
-        
-        timestamps = []
+        timestamps_ns = []
         prices = []
         
-        for timeseries in root.findall('.//ns:TimeSeries', ns):
-            for period in timeseries.findall('.//ns:Period', ns):
+        # Stream the XML body into the parser so parsing overlaps the download
+        with self._request_session.get(ENTSOE_API_URL, params=params, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            for period, _ in _iter_periods(response.raw, tags):
                 # Get period start time
-                start_time_str = period.find('ns:timeInterval/ns:start', ns).text
-                # Parse time (format: 2026-01-04T23:00Z)
-                period_start = pd.to_datetime(start_time_str).tz_convert(TIMEZONE)
+                start_time_str = period.findtext(tags.start)
+                # Parse time (format: 2026-01-04T23:00Z) as UTC nanoseconds, localized once at the end
+                period_start_ns = _utc_ns(start_time_str)
                 
                 # Get resolution (commonly PT60M = 60 minutes)
-                resolution = period.find('ns:resolution', ns).text
+                resolution = period.findtext(tags.resolution)
                 if resolution == 'PT60M':
                     freq = pd.Timedelta(hours=1)
                 elif resolution == 'PT15M':
@@ -79,28 +721,38 @@ class ENTSOEClient:
                 else:
                     freq = pd.Timedelta(hours=1)
                 
-                # Extract all data points
-                for point in period.findall('ns:Point', ns):
-                    position = int(point.find('ns:position', ns).text)
-                    price = float(point.find('ns:price.amount', ns).text)
-                    
-                    # Compute timestamp
-                    timestamp = period_start + (position - 1) * freq
-                    
-                    timestamps.append(timestamp)
-                    prices.append(price)
+                # Extract all data points of the period into arrays
+                positions, values = _point_arrays(period, tags, tags.price)
+                
+                # Compute timestamps for the whole period at once (UTC nanoseconds)
+                timestamps_ns.append(period_start_ns + (positions - 1) * freq.value)
+                prices.append(values)
         
-        # Create DataFrame and deduplicate
-        df = pd.DataFrame({'timestamp': timestamps, 'price': prices})
-        df = df.drop_duplicates(subset=['timestamp'], keep='first').sort_values('timestamp')
+        # Deduplicate, then create DataFrame
+        n_points = sum(len(values) for values in prices)
+        # Prices are the prediction target and stay float64 (EUR/MWh with cent precision)
+        timestamps, price_values = _unique_points(timestamps_ns, prices, np.float64)
+        df = pd.DataFrame({'timestamp': timestamps, 'price': price_values})
         
-        logger.info(f"  ✅ 原始 API 返回 {len(timestamps)} 个数据点，去重后 {len(df)} 个")
+        logger.info(f"  ✅ 原始 API 返回 {n_points} 个数据点，去重后 {len(df)} 个")
         return df
     
-    @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
     def fetch_day_ahead_prices(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
         """
         acquire day-ahead electricity prices
+        
+        Ranges longer than CHUNKING_THRESHOLD are split into month windows; each window is
+        retried and cached on its own.
+        """
+        if end - start > CHUNKING_THRESHOLD:
+            return self._fetch_chunked(self._fetch_day_ahead_prices_window, start, end)
+        return self._fetch_day_ahead_prices_window(start, end)
+    
+    @_disk_cached('day_ahead_prices')
+    @retry(retry=retry_if_exception_type(TRANSIENT_ERRORS), wait=_JITTER_WAIT, stop=stop_after_attempt(5))
+    def _fetch_day_ahead_prices_window(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        acquire day-ahead electricity prices for a single window
         """
         logger.info(f"获取日前价格: {start} 到 {end}")
         
@@ -110,6 +762,12 @@ class ENTSOEClient:
             logger.info(f"✅ 成功获取 {len(df)} 条价格数据（使用原始 API）")
             return df
         except Exception as raw_api_error:
+            if _is_rate_limited(raw_api_error) or isinstance(raw_api_error, TRANSIENT_ERRORS):
+                # Rate limits and network failures would hit entsoe-py just the same:
+                # surface them to the retry instead of re-issuing the request through it
+                raise
+            if not self.enable_fallback:
+                raise
             logger.warning(f"⚠️  原始 API 调用失败: {raw_api_error}")
             logger.info(f"  尝试使用 entsoe-py 库...")
         
@@ -121,29 +779,29 @@ class ENTSOEClient:
                 end=end
             )
             
-            # 🔍 Detailed debug information
-            logger.info(f"  📊 原始数据类型: {type(prices)}")
+            # 🔍 Detailed debug information (only built when DEBUG logging is on)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"  📊 原始数据类型: {type(prices)}")
+                if isinstance(prices, pd.Series):
+                    logger.debug(f"  📊 Series 长度: {len(prices)}")
+                    logger.debug(f"  📊 Index 长度: {len(prices.index)}")
+                    logger.debug(f"  📊 Values 长度: {len(prices.values)}")
+                    logger.debug(f"  📊 Index 类型: {type(prices.index)}")
+                    logger.debug(f"  📊 前3个时间戳: {list(prices.index[:3])}")
+                    logger.debug(f"  📊 后3个时间戳: {list(prices.index[-3:])}")
+                elif isinstance(prices, pd.DataFrame):
+                    logger.debug(f"  📊 DataFrame 形状: {prices.shape}")
+                    logger.debug(f"  📊 列名: {list(prices.columns)}")
+                    logger.debug(f"  📊 Index 长度: {len(prices.index)}")
             
             if isinstance(prices, pd.Series):
-                logger.info(f"  📊 Series 长度: {len(prices)}")
-                logger.info(f"  📊 Index 长度: {len(prices.index)}")
-                logger.info(f"  📊 Values 长度: {len(prices.values)}")
-                logger.info(f"  📊 Index 类型: {type(prices.index)}")
-                logger.info(f"  📊 前3个时间戳: {list(prices.index[:3])}")
-                logger.info(f"  📊 后3个时间戳: {list(prices.index[-3:])}")
-                
                 # Check for duplicate timestamps
                 duplicates = prices.index.duplicated()
                 if duplicates.any():
                     logger.warning(f"  ⚠️  发现 {duplicates.sum()} 个重复时间戳！")
                     # Deduplicate: keep the first occurrence
                     prices = prices[~duplicates]
-                    logger.info(f"  ✅ 去重后长度: {len(prices)}")
-            
-            elif isinstance(prices, pd.DataFrame):
-                logger.info(f"  📊 DataFrame 形状: {prices.shape}")
-                logger.info(f"  📊 列名: {list(prices.columns)}")
-                logger.info(f"  📊 Index 长度: {len(prices.index)}")
+                    logger.debug("  ✅ 去重后长度: %d", len(prices))
             
         except Exception as query_error:
             logger.error(f"❌ API 查询失败: {query_error}")
@@ -155,9 +813,8 @@ class ENTSOEClient:
         # Try converting to a DataFrame (multiple approaches)
         try:
             if isinstance(prices, pd.Series):
-                # Method 1: to_frame()
-                df = prices.to_frame(name='price').reset_index()
-                df.columns = ['timestamp', 'price']
+                # Method 1: to_frame(), naming the index so reset_index yields the timestamp column directly
+                df = prices.to_frame(name='price').rename_axis('timestamp').reset_index()
             else:
                 # DataFrame
                 df = prices.reset_index()
@@ -177,10 +834,10 @@ class ENTSOEClient:
             # 🔧 Backup method: manually construct, but ensure lengths align first
             try:
                 if isinstance(prices, pd.Series):
-                    timestamps = list(prices.index)
-                    values = list(prices.values)
+                    timestamps = prices.index
+                    values = prices.to_numpy()
                     
-                    logger.info(f"  备用方法: timestamps={len(timestamps)}, values={len(values)}")
+                    logger.debug("  备用方法: timestamps=%d, values=%d", len(timestamps), len(values))
                     
                     # Force-align lengths
                     min_len = min(len(timestamps), len(values))
@@ -202,10 +859,6 @@ class ENTSOEClient:
         """
         直接调用 ENTSO-E REST API 获取负载预测
         """
-        import requests
-        from xml.etree import ElementTree as ET
-        
-        url = "https://web-api.tp.entsoe.eu/api"
         params = {
             'securityToken': self.api_key,
             'documentType': 'A65',  # System total load forecast
@@ -216,91 +869,67 @@ class ENTSOEClient:
         }
         
         logger.info(f"  直接调用 ENTSO-E REST API (负载预测)...")
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        # 🔍 Debug: log/save raw XML
-        logger.debug(f"  Response status: {response.status_code}")
-        logger.debug(f"  Response length: {len(response.content)} bytes")
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        
-        # 🔍 Try multiple possible XML namespaces
-        possible_namespaces = [
-            {'ns': 'urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0'},  # Generation/Load Document（正确的！）
-            {'ns': 'urn:iec62325.351:tc57wg16:451-6:loaddocument:3:0'},
-            {'ns': 'urn:iec62325.351:tc57wg16:451-3:publicationdocument:7:3'},
-            {},  # 无命名空间
-        ]
-        
-        timestamps = []
+        timestamps_ns = []
         loads = []
-        timeseries_list = []
-        used_ns = {}
-        
-        for ns in possible_namespaces:
-            timeseries_list = root.findall('.//ns:TimeSeries', ns) if ns else root.findall('.//TimeSeries')
-            if timeseries_list:
-                used_ns = ns
-                logger.info(f"  ✅ 找到 {len(timeseries_list)} 个 TimeSeries（命名空间: {ns.get('ns', 'none')}）")
-                break
-        
-        if not timeseries_list:
-            logger.warning(f"  ⚠️  未找到 TimeSeries，尝试查看 XML 根节点...")
-            logger.warning(f"  根节点: {root.tag}")
-            logger.warning(f"  子节点: {[child.tag for child in root][:5]}")
-            # Try without namespace
-            timeseries_list = root.findall('.//TimeSeries')
-        
-        for timeseries in timeseries_list:
-            # Try both namespaced and non-namespaced paths
-            periods = timeseries.findall('.//ns:Period', used_ns) if used_ns else timeseries.findall('.//Period')
-            
-            for period in periods:
+        tags = None
+        
+        # Stream the XML body into the parser
+        with self._request_session.get(ENTSOE_API_URL, params=params, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            logger.debug("  Response status: %s", response.status_code)
+            for period, _ in _iter_periods(response.raw):
+                # ENTSO-E uses one stable namespace per document type: take it from the first Period
+                if tags is None:
+                    tags = _qualified_tags(_namespace_uri(period.tag))
+                
                 # Get start time
-                start_elem = period.find('ns:timeInterval/ns:start', used_ns) if used_ns else period.find('.//start')
-                if start_elem is None:
+                start_time_str = period.findtext(tags.start)
+                if start_time_str is None:
                     continue
-                start_time_str = start_elem.text
-                period_start = pd.to_datetime(start_time_str).tz_convert(TIMEZONE)
+                period_start_ns = _utc_ns(start_time_str)
                 
                 # Get resolution
-                res_elem = period.find('ns:resolution', used_ns) if used_ns else period.find('.//resolution')
-                resolution = res_elem.text if res_elem is not None else 'PT60M'
+                resolution = period.findtext(tags.resolution, default='PT60M')
                 freq = pd.Timedelta(hours=1) if resolution == 'PT60M' else pd.Timedelta(minutes=15)
                 
-                # Get data points
-                points = period.findall('ns:Point', used_ns) if used_ns else period.findall('.//Point')
-                for point in points:
-                    pos_elem = point.find('ns:position', used_ns) if used_ns else point.find('.//position')
-                    qty_elem = point.find('ns:quantity', used_ns) if used_ns else point.find('.//quantity')
-                    
-                    if pos_elem is None or qty_elem is None:
-                        continue
-                    
-                    position = int(pos_elem.text)
-                    load = float(qty_elem.text)
-                    
-                    timestamp = period_start + (position - 1) * freq
-                    timestamps.append(timestamp)
-                    loads.append(load)
+                # Get data points (skipping incomplete ones) into arrays
+                positions, values = _point_arrays(period, tags, tags.quantity)
+                
+                timestamps_ns.append(period_start_ns + (positions - 1) * freq.value)
+                loads.append(values)
         
         # Create DataFrame
-        if not timestamps:
+        n_points = sum(len(values) for values in loads)
+        if tags is None:
+            logger.warning(f"  ⚠️  未找到 TimeSeries / Period")
+        if n_points == 0:
             logger.warning("  ⚠️  原始 API 未返回任何数据，将尝试 entsoe-py 库")
             raise ValueError("No load forecast data from raw API")
         
-        df = pd.DataFrame({'timestamp': timestamps, 'load_forecast': loads})
-        df = df.drop_duplicates(subset=['timestamp'], keep='first').sort_values('timestamp')
+        timestamps, load_values = _unique_points(timestamps_ns, loads)
+        df = pd.DataFrame({'timestamp': timestamps, 'load_forecast': load_values})
         
-        logger.info(f"  ✅ 原始 API 返回 {len(timestamps)} 个数据点，去重后 {len(df)} 个")
+        logger.info(f"  ✅ 原始 API 返回 {n_points} 个数据点，去重后 {len(df)} 个")
         return df
     
-    @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
     def fetch_load_forecast(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
         """
         获取总负载预测（增强版：优先使用原始 API）
+        
+        Ranges longer than CHUNKING_THRESHOLD are split into month windows; each window is
+        retried and cached on its own.
+        """
+        if end - start > CHUNKING_THRESHOLD:
+            return self._fetch_chunked(self._fetch_load_forecast_window, start, end)
+        return self._fetch_load_forecast_window(start, end)
+    
+    @_disk_cached('load_forecast')
+    @retry(retry=retry_if_exception_type(TRANSIENT_ERRORS), wait=_JITTER_WAIT, stop=stop_after_attempt(5))
+    def _fetch_load_forecast_window(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        获取总负载预测（增强版：优先使用原始 API）（单个时间窗口）
         """
         logger.info(f"获取负载预测: {start} 到 {end}")
         
@@ -310,6 +939,12 @@ class ENTSOEClient:
             logger.info(f"✅ 成功获取 {len(df)} 条负载预测数据（使用原始 API）")
             return df
         except Exception as raw_api_error:
+            if _is_rate_limited(raw_api_error) or isinstance(raw_api_error, TRANSIENT_ERRORS):
+                # Rate limits and network failures would hit entsoe-py just the same:
+                # surface them to the retry instead of re-issuing the request through it
+                raise
+            if not self.enable_fallback:
+                raise
             logger.warning(f"⚠️  原始 API 调用失败: {raw_api_error}")
             logger.info(f"  尝试使用 entsoe-py 库...")
         
@@ -321,36 +956,30 @@ class ENTSOEClient:
                 end=end
             )
             
-            logger.info(f"  📊 负载数据类型: {type(load)}")
+            logger.debug("  📊 负载数据类型: %s", type(load))
+            
+            # Check for duplicate index entries (mask computed once, shared by both branches)
+            duplicated = load.index.duplicated(keep='first')
+            if duplicated.any():
+                logger.warning(f"  ⚠️  发现重复索引，正在去重...")
+                load = load[~duplicated]
             
             # Handle both DataFrame and Series cases
             if isinstance(load, pd.DataFrame):
-                logger.info(f"  📊 DataFrame 形状: {load.shape}")
-                logger.info(f"  📊 列名: {list(load.columns)}")
-                
-                # Check for duplicate index entries
-                if load.index.duplicated().any():
-                    logger.warning(f"  ⚠️  发现重复索引，正在去重...")
-                    load = load[~load.index.duplicated()]
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"  📊 DataFrame 形状: {load.shape}")
+                    logger.debug(f"  📊 列名: {list(load.columns)}")
                 
                 if load.shape[1] == 1:
                     load_values = load.iloc[:, 0]
                 else:
                     load_values = load.mean(axis=1)
-                    logger.info(f"  使用 {load.shape[1]} 列的平均值")
-                
-                df = load_values.to_frame(name='load_forecast').reset_index()
-                df.columns = ['timestamp', 'load_forecast']
+                    logger.debug("  使用 %d 列的平均值", load.shape[1])
             else:
-                logger.info(f"  📊 Series 长度: {len(load)}")
-                
-                # Check for duplicate index entries
-                if load.index.duplicated().any():
-                    logger.warning(f"  ⚠️  发现重复索引，正在去重...")
-                    load = load[~load.index.duplicated()]
-                
-                df = load.to_frame(name='load_forecast').reset_index()
-                df.columns = ['timestamp', 'load_forecast']
+                logger.debug("  📊 Series 长度: %d", len(load))
+                load_values = load
+            
+            df = load_values.to_frame(name='load_forecast').rename_axis('timestamp').reset_index()
             
             logger.info(f"✅ 成功获取 {len(df)} 条负载预测数据")
             return df
@@ -363,16 +992,12 @@ class ENTSOEClient:
             # 🛡️ Final fallback: return an empty DataFrame so the pipeline can continue
             logger.warning("⚠️  所有方法都失败了，返回空负载预测数据")
             logger.warning("⚠️  后续的数据清洗步骤会使用前向填充或默认值")
-            return pd.DataFrame(columns=['timestamp', 'load_forecast'])
+            return _mark_incomplete(pd.DataFrame(columns=['timestamp', 'load_forecast']))
     
     def _fetch_wind_solar_raw_api(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
         """
         直接调用 ENTSO-E REST API 获取风电和光伏预测
         """
-        import requests
-        from xml.etree import ElementTree as ET
-        
-        url = "https://web-api.tp.entsoe.eu/api"
         params = {
             'securityToken': self.api_key,
             'documentType': 'A69',  # Wind and solar forecast
@@ -383,58 +1008,67 @@ class ENTSOEClient:
         }
         
         logger.info(f"  直接调用 ENTSO-E REST API (风光预测)...")
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        # Parse XML
-        root = ET.fromstring(response.content)
-        ns = {'ns': 'urn:iec62325.351:tc57wg16:451-6:generationloaddocument:3:0'}
-        
-        wind_data = {}
-        solar_data = {}
-        
-        for timeseries in root.findall('.//ns:TimeSeries', ns):
-            # Get generation type
-            psr_type_elem = timeseries.find('.//ns:MktPSRType/ns:psrType', ns)
-            if psr_type_elem is None:
-                continue
-            psr_type = psr_type_elem.text
-            
-            for period in timeseries.findall('.//ns:Period', ns):
-                start_time_str = period.find('ns:timeInterval/ns:start', ns).text
-                period_start = pd.to_datetime(start_time_str).tz_convert(TIMEZONE)
+        tags = GENERATION_LOAD_TAGS
+        
+        timestamps_ns = []
+        quantities = []
+        wind_flags = []
+        
+        # Stream the XML body into the parser so parsing overlaps the download
+        with self._request_session.get(ENTSOE_API_URL, params=params, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            
+            for period, psr_type in _iter_periods(response.raw, tags):
+                # B16 = Solar, B18 = Wind Offshore, B19 = Wind Onshore
+                if psr_type == 'B16':  # Solar
+                    is_wind = False
+                elif psr_type in ['B18', 'B19']:  # Wind (Offshore + Onshore)
+                    is_wind = True
+                else:
+                    continue
+                
+                start_time_str = period.findtext(tags.start)
+                period_start_ns = _utc_ns(start_time_str)
                 
-                resolution = period.find('ns:resolution', ns).text
+                resolution = period.findtext(tags.resolution)
                 freq = pd.Timedelta(hours=1) if resolution == 'PT60M' else pd.Timedelta(minutes=15)
                 
-                for point in period.findall('ns:Point', ns):
-                    position = int(point.find('ns:position', ns).text)
-                    quantity = float(point.find('ns:quantity', ns).text)
-                    
-                    timestamp = period_start + (position - 1) * freq
-                    
-                    # B19 = Solar, B18 = Wind Offshore, B19 = Wind Onshore
-                    if psr_type == 'B16':  # Solar
-                        solar_data[timestamp] = solar_data.get(timestamp, 0) + quantity
-                    elif psr_type in ['B18', 'B19']:  # Wind (Offshore + Onshore)
-                        wind_data[timestamp] = wind_data.get(timestamp, 0) + quantity
-        
-        # Create DataFrame
-        all_timestamps = sorted(set(list(wind_data.keys()) + list(solar_data.keys())))
+                positions, values = _point_arrays(period, tags, tags.quantity)
+                
+                timestamps_ns.append(period_start_ns + (positions - 1) * freq.value)
+                quantities.append(values)
+                wind_flags.append(is_wind)
         
+        # Create DataFrame: each point goes into its wind or solar column (0 in the other),
+        # then one groupby sums the PSR types per timestamp
+        quantity = np.concatenate(quantities).astype(np.float32) if quantities else np.empty(0, dtype=np.float32)
+        is_wind = np.repeat(wind_flags, [len(values) for values in quantities]).astype(bool)
         df = pd.DataFrame({
-            'timestamp': all_timestamps,
-            'wind_forecast': [wind_data.get(ts, 0) for ts in all_timestamps],
-            'solar_forecast': [solar_data.get(ts, 0) for ts in all_timestamps]
-        })
+            'timestamp': _to_local_timestamps(timestamps_ns),
+            'wind_forecast': np.where(is_wind, quantity, np.float32(0)),
+            'solar_forecast': np.where(is_wind, np.float32(0), quantity),
+        }).groupby('timestamp', sort=True).sum().reset_index()
         
         logger.info(f"  ✅ 风光预测获取成功: {len(df)} 个时间点")
         return df
     
-    @retry(wait=wait_exponential(multiplier=1, min=4, max=10), stop=stop_after_attempt(3))
     def fetch_wind_solar_forecast(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
         """
         获取风电和光伏发电预测（优先使用原始 API）
+        
+        Ranges longer than CHUNKING_THRESHOLD are split into month windows; each window is
+        retried and cached on its own.
+        """
+        if end - start > CHUNKING_THRESHOLD:
+            return self._fetch_chunked(self._fetch_wind_solar_forecast_window, start, end)
+        return self._fetch_wind_solar_forecast_window(start, end)
+    
+    @_disk_cached('wind_solar_forecast')
+    @retry(retry=retry_if_exception_type(TRANSIENT_ERRORS), wait=_JITTER_WAIT, stop=stop_after_attempt(5))
+    def _fetch_wind_solar_forecast_window(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        获取风电和光伏发电预测（优先使用原始 API）（单个时间窗口）
         """
         logger.info(f"获取风光预测: {start} 到 {end}")
         
@@ -444,6 +1078,12 @@ class ENTSOEClient:
             logger.info(f"✅ 成功获取 {len(df)} 条风光预测数据（使用原始 API）")
             return df
         except Exception as raw_api_error:
+            if _is_rate_limited(raw_api_error) or isinstance(raw_api_error, TRANSIENT_ERRORS):
+                # Rate limits and network failures would hit entsoe-py just the same:
+                # surface them to the retry instead of re-issuing the request through it
+                raise
+            if not self.enable_fallback:
+                raise
             logger.warning(f"⚠️  原始 API 调用失败: {raw_api_error}")
             logger.info(f"  尝试使用 entsoe-py 库...")
         
@@ -457,64 +1097,68 @@ class ENTSOEClient:
                 psr_type=None  # 获取所有类型
             )
             
-            # Initialize result DataFrame
-            result_df = pd.DataFrame(index=data.index)
+            # Guard against duplicate column names once, so every column selection below is a Series
+            if data.columns.has_duplicates:
+                data = data.loc[:, ~data.columns.duplicated()]
             
-            # Extract wind data (may contain multiple types)
-            wind_total = 0
-            wind_columns = []
+            # Lower-case the PSR type names once for both the wind and the solar match
+            lower_columns = data.columns.str.lower()
             
-            for col in data.columns:
-                if 'wind' in col.lower():
-                    wind_columns.append(col)
-                    if isinstance(data[col], pd.Series):
-                        wind_total = wind_total + data[col] if isinstance(wind_total, pd.Series) else data[col]
-                    
-            if isinstance(wind_total, pd.Series) and len(wind_total) > 0:
-                result_df['wind_forecast'] = wind_total
-                logger.info(f"风电数据来源: {wind_columns}")
+            # Extract wind data (may contain multiple types): one row-wise sum over all wind columns
+            wind_mask = lower_columns.str.contains('wind')
+            wind_columns = list(data.columns[wind_mask])
+            
+            # Columns are float32 like the raw API path; missing ones start out as zeros
+            if wind_columns and len(data) > 0:
+                wind_values = data.loc[:, wind_mask].sum(axis=1, skipna=False).to_numpy(dtype=np.float32)
+                logger.debug("风电数据来源: %s", wind_columns)
             else:
-                result_df['wind_forecast'] = 0
+                wind_values = np.zeros(len(data), dtype=np.float32)
                 logger.warning("未找到风电数据，填充为0")
             
-            # Extract solar (PV) data
-            if 'Solar' in data.columns:
-                result_df['solar_forecast'] = data['Solar']
-                logger.info("光伏数据来源: ['Solar']")
-            elif 'solar' in [c.lower() for c in data.columns]:
-                # Look for a lowercase 'solar' column
-                solar_col = [c for c in data.columns if 'solar' in c.lower()][0]
-                result_df['solar_forecast'] = data[solar_col]
-                logger.info(f"光伏数据来源: ['{solar_col}']")
+            # Extract solar (PV) data the same way, matching either capitalization
+            solar_mask = lower_columns.str.contains('solar')
+            solar_columns = list(data.columns[solar_mask])
+            
+            if solar_columns and len(data) > 0:
+                solar_values = data.loc[:, solar_mask].sum(axis=1, skipna=False).to_numpy(dtype=np.float32)
+                logger.debug("光伏数据来源: %s", solar_columns)
             else:
-                result_df['solar_forecast'] = 0
+                solar_values = np.zeros(len(data), dtype=np.float32)
                 logger.warning("未找到光伏数据，填充为0")
             
-            # Reset index and select required columns
-            result_df = result_df.reset_index()
-            # Ensure first column is the timestamp
-            if result_df.columns[0] != 'timestamp':
-                result_df = result_df.rename(columns={result_df.columns[0]: 'timestamp'})
-            result_df = result_df[['timestamp', 'wind_forecast', 'solar_forecast']]
+            # Build the result in one construction, with the index as the timestamp column
+            result_df = pd.DataFrame(
+                {'wind_forecast': wind_values, 'solar_forecast': solar_values},
+                index=data.index
+            ).rename_axis('timestamp').reset_index()
             
             logger.info(f"成功获取 {len(result_df)} 条风光预测数据")
-            logger.info(f"  风电范围: {result_df['wind_forecast'].min():.1f} - {result_df['wind_forecast'].max():.1f} MW")
-            logger.info(f"  光伏范围: {result_df['solar_forecast'].min():.1f} - {result_df['solar_forecast'].max():.1f} MW")
+            if logger.isEnabledFor(logging.DEBUG):
+                # Min/max of both columns in one aggregation
+                ranges = result_df[['wind_forecast', 'solar_forecast']].agg(['min', 'max'])
+                logger.debug(f"  风电范围: {ranges.at['min', 'wind_forecast']:.1f} - {ranges.at['max', 'wind_forecast']:.1f} MW")
+                logger.debug(f"  光伏范围: {ranges.at['min', 'solar_forecast']:.1f} - {ranges.at['max', 'solar_forecast']:.1f} MW")
             return result_df
             
         except Exception as e:
             logger.error(f"获取风光预测失败: {e}")
             # Return empty DataFrame to avoid breaking the pipeline
             logger.warning("返回空风光预测数据")
-            return pd.DataFrame(columns=['timestamp', 'wind_forecast', 'solar_forecast'])
+            return _mark_incomplete(pd.DataFrame(columns=['timestamp', 'wind_forecast', 'solar_forecast']))
     
-    def fetch_all_market_data(self, start_date: str, end_date: str) -> pd.DataFrame:
+    def fetch_all_market_data(self, start_date: str, end_date: str, use_cache: bool = True) -> pd.DataFrame:
         """
         获取所有市场数据并合并
         
+        Results are cached as parquet under MARKET_CACHE_DIR, keyed by (bidding zone, start, end);
+        settled ranges (ended at least CACHE_SETTLE_TIME ago) never expire, recent ones after
+        RECENT_CACHE_TTL['market']. Incomplete results (see _mark_incomplete) are not cached.
+        
         Args:
             start_date: 开始日期字符串 'YYYY-MM-DD'
             end_date: 结束日期字符串 'YYYY-MM-DD'
+            use_cache: Whether to read/write the on-disk cache
             
         Returns:
             合并后的完整DataFrame
@@ -523,23 +1167,91 @@ class ENTSOEClient:
         start = pd.Timestamp(start_date, tz=TIMEZONE)
         end = pd.Timestamp(end_date, tz=TIMEZONE)
         
-        # Fetch each type of data
-        prices_df = self.fetch_day_ahead_prices(start, end)
-        load_df = self.fetch_load_forecast(start, end)
-        wind_solar_df = self.fetch_wind_solar_forecast(start, end)
+        if not (use_cache and self.use_cache):
+            return self._fetch_all_market_data_uncached(start, end)
+        
+        cache_path = _cache_path('market', self.bidding_zone, start, end)
+        df = read_cached(cache_path, _cache_max_age('market', end))
+        if df is None:
+            df = self._fetch_all_market_data_uncached(start, end)
+            if _is_complete(df):
+                write_cached(cache_path, df)
+        return df
+    
+    def _fetch_all_market_data_uncached(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        获取所有市场数据并合并（不使用缓存）
+        
+        Args:
+            start: Start time
+            end: End time
+            
+        Returns:
+            合并后的完整DataFrame (flagged incomplete if any of the fetched parts was)
+        """
+        # Fetch each type of data concurrently (the requests are independent and I/O bound)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            prices_future = executor.submit(self.fetch_day_ahead_prices, start, end)
+            load_future = executor.submit(self.fetch_load_forecast, start, end)
+            wind_solar_future = executor.submit(self.fetch_wind_solar_forecast, start, end)
+            
+            # Prices are required; a failed forecast fetch degrades to an empty frame like the
+            # fetchers' own final fallbacks, so the price data is still returned
+            prices_df = prices_future.result()
+            load_df = _result_or_empty(load_future, ['timestamp', 'load_forecast'], '负载预测')
+            wind_solar_df = _result_or_empty(
+                wind_solar_future, ['timestamp', 'wind_forecast', 'solar_forecast'], '风光预测'
+            )
         
         # Log data shapes
         logger.info(f"数据形状: 价格={len(prices_df)}, 负载={len(load_df)}, 风光={len(wind_solar_df)}")
         
-        # Merge data
-        df = prices_df.merge(load_df, on='timestamp', how='left')
-        logger.info(f"价格+负载合并后: {len(df)} 条记录")
-        
-        df = df.merge(wind_solar_df, on='timestamp', how='left')
+        # Merge data: align load and wind/solar onto the price timestamps by index and place the
+        # columns side by side (no hash join on a key column, no sorting); the fetchers keep
+        # 'timestamp' as a column because that is what the pipelines and the entsoe-py fallbacks use.
+        frames = {
+            '价格': prices_df.set_index('timestamp'),
+            '负载': load_df.set_index('timestamp'),
+            '风光': wind_solar_df.set_index('timestamp'),
+        }
+        for name, frame in frames.items():
+            # One-to-one check: duplicate keys would make join fall back to a many-to-many merge
+            if not frame.index.is_unique:
+                logger.warning(f"  ⚠️  {name}数据存在重复时间戳，保留首次出现")
+                frames[name] = frame[~frame.index.duplicated(keep='first')]
+            # float32 load/generation values (the fallbacks return float64): halves the bytes moved
+            # by join and fill; price, the target, stays float64
+            float64_cols = frame.select_dtypes(include='float64').columns.drop('price', errors='ignore')
+            if len(float64_cols) > 0:
+                frames[name] = frames[name].astype(dict.fromkeys(float64_cols, np.float32))
+        prices_frame, *other_frames = frames.values()
+        # reindex is a no-op when a frame already has exactly the price timestamps (the usual case)
+        df = pd.concat(
+            [prices_frame, *(frame.reindex(prices_frame.index) for frame in other_frames)],
+            axis=1
+        ).reset_index()
         logger.info(f"最终合并后: {len(df)} 条记录")
         
-        # Fill missing values (using modern pandas syntax)
-        df = df.ffill().bfill()
+        # Fill missing values (using modern pandas syntax); skipped when the join left no gaps
+        if df.isna().to_numpy().any():
+            float_cols = df.select_dtypes(include='floating').columns
+            other_cols = df.columns.difference(float_cols)
+            if not df[other_cols].isna().to_numpy().any():
+                # One in-place fill of a single float buffer (JIT-compiled for long frames when numba is installed)
+                # instead of two pandas passes that each allocate a new frame
+                work_dtype = np.result_type(*df.dtypes[float_cols])
+                values = np.asfortranarray(df[float_cols].to_numpy(dtype=work_dtype, copy=True))
+                _ffill_bfill_kernel(values)
+                # Write back keeping each column's dtype (float64 price, float32 forecasts)
+                filled = pd.DataFrame(values, index=df.index, columns=float_cols)
+                df[float_cols] = filled.astype(df.dtypes[float_cols].to_dict())
+            else:
+                df = df.ffill().bfill()
+        
+        # Only a merge of three complete, non-empty parts may be cached: a failed or empty part
+        # leaves an all-NaN (or filled) column that would otherwise never expire for settled ranges
+        if not all(_is_complete(part) and not part.empty for part in (prices_df, load_df, wind_solar_df)):
+            _mark_incomplete(df)
         
         logger.info(f"✅ 合并完成，共 {len(df)} 条记录")
         return df
@@ -1,17 +1,69 @@
 """
 Open-Meteo weather data client
 """
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 from datetime import datetime, timedelta
 from config.settings import SE3_LOCATIONS, TIMEZONE
+from data.cache import read_cached, write_cached
 import logging
+import hashlib
+from pathlib import Path
 from typing import List, Dict
 import numpy as np
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # orjson is optional, fall back to the stdlib JSON parser
+    from json import loads as json_loads
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# On-disk parquet cache of weighted weather data: forecasts are refreshed hourly by Open-Meteo,
+# archive ranges are final once they are older than ARCHIVE_SETTLE_TIME (reanalysis delay)
+WEATHER_CACHE_DIR = Path("data/local_cache/weather")
+FORECAST_CACHE_TTL = pd.Timedelta(hours=1)
+ARCHIVE_SETTLE_TIME = pd.Timedelta(days=7)
+
+
+def _weighted_sum(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Sum the weighted per-location frames per timestamp (the weighted average)
+    
+    Args:
+        frames: Weighted per-location DataFrames (timestamp + weather columns)
+        
+    Returns:
+        DataFrame with one row per timestamp and the *_avg columns
+    """
+    value_cols = ['temperature_2m', 'wind_speed_10m', 'wind_speed_80m', 'irradiance']
+    timestamps = frames[0]['timestamp']
+    
+    if (timestamps.is_monotonic_increasing and timestamps.is_unique
+            and all(df['timestamp'].equals(timestamps) for df in frames[1:])):
+        # All locations share the same hourly grid (the usual case): accumulate the arrays
+        # (in float64, stored as float32), missing values counting as 0 like in a groupby sum
+        total = np.nan_to_num(frames[0][value_cols].to_numpy(dtype=np.float64))
+        for df in frames[1:]:
+            total += np.nan_to_num(df[value_cols].to_numpy(dtype=np.float64))
+        result_df = pd.DataFrame(total.astype(np.float32), columns=value_cols)
+        result_df.insert(0, 'timestamp', timestamps.to_numpy())
+    else:
+        # group by timestamp and sum weighted values
+        combined_df = pd.concat(frames, ignore_index=True)
+        result_df = combined_df.groupby('timestamp')[value_cols].sum().reset_index()
+    
+    # rename columns
+    return result_df.rename(columns={
+        'temperature_2m': 'temperature_avg',
+        'wind_speed_10m': 'wind_speed_10m_avg',
+        'wind_speed_80m': 'wind_speed_80m_avg',
+        'irradiance': 'irradiance_avg'
+    })
+
 
 class WeatherClient:
     """Open-Meteo weather API client"""
@@ -19,14 +71,17 @@ class WeatherClient:
     BASE_URL = "https://api.open-meteo.com/v1/forecast"
     ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
     
-    def __init__(self, locations: List[Dict] = None):
+    def __init__(self, locations: List[Dict] = None, use_cache: bool = True):
         """
         Initialize weather client
         
         Args:
             locations: list of locations, each with name, lat, lon, weight
+            use_cache: whether results are served from the parquet cache (False bypasses it)
         """
-        self.locations = locations or SE3_LOCATIONS
+        # Copy the dicts so normalizing the weights below never mutates the shared SE3_LOCATIONS
+        self.locations = [dict(loc) for loc in (locations or SE3_LOCATIONS)]
+        self.use_cache = use_cache
         
         # Verify weights sum to 1
         total_weight = sum(loc['weight'] for loc in self.locations)
@@ -34,6 +89,85 @@ class WeatherClient:
             logger.warning(f"位置权重总和为 {total_weight},将自动归一化")
             for loc in self.locations:
                 loc['weight'] /= total_weight
+        
+        # Shared HTTP session so TCP/TLS connections are reused across requests; one pool per
+        # Open-Meteo host (forecast, archive), sized for the concurrent per-location fetches
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=len(self.locations)))
+    
+    def _cache_path(self, name: str, start_date: str, end_date: str) -> Path:
+        """Parquet cache file of one (data name, locations, start, end) query"""
+        locations = ";".join(f"{loc['lat']},{loc['lon']},{loc['weight']}" for loc in self.locations)
+        key = hashlib.blake2b(f"{name}|{locations}|{start_date}|{end_date}".encode()).hexdigest()[:16]
+        return WEATHER_CACHE_DIR / f"{name}_{key}.parquet"
+    
+    def _fetch_location(self, url: str, location: Dict, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        Fetch hourly weather for one location and apply its weight
+        
+        Args:
+            url: Open-Meteo endpoint (forecast or archive)
+            location: location with name, lat, lon, weight
+            start_date: start date 'YYYY-MM-DD'
+            end_date: end date 'YYYY-MM-DD'
+            
+        Returns:
+            Weighted weather DataFrame of the location
+        """
+        params = {
+            'latitude': location['lat'],
+            'longitude': location['lon'],
+            'hourly': [
+                'temperature_2m',
+                'wind_speed_10m',
+                'wind_speed_80m',
+                'direct_normal_irradiance'
+            ],
+            'start_date': start_date,
+            'end_date': end_date,
+            'timezone': 'Europe/Stockholm'
+        }
+        
+        response = self._session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = json_loads(response.content)
+        
+        # Convert to DataFrame (float32 values, like the market data; nulls become NaN)
+        hourly = data['hourly']
+        df = pd.DataFrame({
+            # Open-Meteo returns ISO 8601 times ('2024-01-01T00:00'): skip per-call format inference
+            'timestamp': pd.to_datetime(hourly['time'], format='ISO8601'),
+            'temperature_2m': np.asarray(hourly['temperature_2m'], dtype=np.float32),
+            'wind_speed_10m': np.asarray(hourly['wind_speed_10m'], dtype=np.float32),
+            'wind_speed_80m': np.asarray(hourly['wind_speed_80m'], dtype=np.float32),
+            'irradiance': np.asarray(hourly['direct_normal_irradiance'], dtype=np.float32)
+        })
+        
+        # Apply weights
+        for col in ['temperature_2m', 'wind_speed_10m', 'wind_speed_80m', 'irradiance']:
+            df[col] = df[col] * location['weight']
+        
+        return df
+    
+    def _fetch_all_locations(self, url: str, start_date: str, end_date: str) -> List[tuple]:
+        """
+        Fetch all locations concurrently (the requests are independent and I/O bound)
+        
+        Args:
+            url: Open-Meteo endpoint (forecast or archive)
+            start_date: start date 'YYYY-MM-DD'
+            end_date: end date 'YYYY-MM-DD'
+            
+        Returns:
+            (location name, weighted DataFrame) tuples in location order; the DataFrame is
+            replaced by the raised exception if that location failed
+        """
+        with ThreadPoolExecutor(max_workers=len(self.locations)) as executor:
+            futures = [
+                (location['name'], executor.submit(self._fetch_location, url, location, start_date, end_date))
+                for location in self.locations
+            ]
+        return [(name, future.exception() or future.result()) for name, future in futures]
     
     def fetch_forecast(self, start_date: str, end_date: str) -> pd.DataFrame:
         """
@@ -46,75 +180,35 @@ class WeatherClient:
         Returns:
             Weighted average weather DataFrame
         """
+        cache_path = self._cache_path('forecast', start_date, end_date)
+        if self.use_cache:
+            cached = read_cached(cache_path, FORECAST_CACHE_TTL, log_prefix='[天气] ')
+            if cached is not None:
+                return cached
+        
         logger.info(f"Fetching weather forecast: {start_date} to {end_date}")
         
         all_location_data = []
         
-        for location in self.locations:
-            params = {
-                'latitude': location['lat'],
-                'longitude': location['lon'],
-                'hourly': [
-                    'temperature_2m',
-                    'wind_speed_10m',
-                    'wind_speed_80m',
-                    'direct_normal_irradiance'
-                ],
-                'start_date': start_date,
-                'end_date': end_date,
-                'timezone': 'Europe/Stockholm'
-            }
-            
-            try:
-                response = requests.get(self.BASE_URL, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Convert to DataFrame
-                df = pd.DataFrame({
-                    'timestamp': pd.to_datetime(data['hourly']['time']),
-                    'temperature_2m': data['hourly']['temperature_2m'],
-                    'wind_speed_10m': data['hourly']['wind_speed_10m'],
-                    'wind_speed_80m': data['hourly']['wind_speed_80m'],
-                    'irradiance': data['hourly']['direct_normal_irradiance']
-                })
-                
-                # Apply weights
-                for col in ['temperature_2m', 'wind_speed_10m', 'wind_speed_80m', 'irradiance']:
-                    df[col] = df[col] * location['weight']
-                
-                df['location'] = location['name']
-                all_location_data.append(df)
-                
-                logger.info(f"Successfully fetched weather for {location['name']}")
-                
-            except Exception as e:
-                logger.error(f"Failed to fetch {location['name']} weather data: {e}")
+        for name, df in self._fetch_all_locations(self.BASE_URL, start_date, end_date):
+            if isinstance(df, Exception):
+                logger.error(f"Failed to fetch {name} weather data: {df}")
                 continue
+            
+            all_location_data.append(df)
+            
+            logger.info(f"Successfully fetched weather for {name}")
         
         if not all_location_data:
             raise ValueError("false to fetch weather data for any location")
         
         # Combine and weight average
-        combined_df = pd.concat(all_location_data, ignore_index=True)
-        
-        # group by timestamp and sum weighted values
-        result_df = combined_df.groupby('timestamp').agg({
-            'temperature_2m': 'sum',
-            'wind_speed_10m': 'sum',
-            'wind_speed_80m': 'sum',
-            'irradiance': 'sum'
-        }).reset_index()
-        
-        # rename columns
-        result_df = result_df.rename(columns={
-            'temperature_2m': 'temperature_avg',
-            'wind_speed_10m': 'wind_speed_10m_avg',
-            'wind_speed_80m': 'wind_speed_80m_avg',
-            'irradiance': 'irradiance_avg'
-        })
+        result_df = _weighted_sum(all_location_data)
 
         logger.info(f"weighted average completed, {len(result_df)} records")
+        # Only cache complete results: a missing location would leave the weights summing below 1
+        if self.use_cache and len(all_location_data) == len(self.locations):
+            write_cached(cache_path, result_df, log_prefix='[天气] ')
         return result_df
     
     def fetch_historical(self, start_date: str, end_date: str) -> pd.DataFrame:
@@ -128,69 +222,36 @@ class WeatherClient:
         Returns:
             weighted average historical weather DataFrame
         """
+        cache_path = self._cache_path('historical', start_date, end_date)
+        if self.use_cache:
+            # Settled archive ranges never change, recent ones may still be filled in
+            settled = pd.Timestamp(end_date) <= pd.Timestamp.now() - ARCHIVE_SETTLE_TIME
+            cached = read_cached(cache_path, None if settled else FORECAST_CACHE_TTL, log_prefix='[天气] ')
+            if cached is not None:
+                return cached
+        
         logger.info(f"Fetching historical weather data: {start_date} to {end_date}")
         
         all_location_data = []
         
-        for location in self.locations:
-            params = {
-                'latitude': location['lat'],
-                'longitude': location['lon'],
-                'start_date': start_date,
-                'end_date': end_date,
-                'hourly': [
-                    'temperature_2m',
-                    'wind_speed_10m',
-                    'wind_speed_80m',
-                    'direct_normal_irradiance'
-                ],
-                'timezone': 'Europe/Stockholm'
-            }
-            
-            try:
-                response = requests.get(self.ARCHIVE_URL, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                
-                df = pd.DataFrame({
-                    'timestamp': pd.to_datetime(data['hourly']['time']),
-                    'temperature_2m': data['hourly']['temperature_2m'],
-                    'wind_speed_10m': data['hourly']['wind_speed_10m'],
-                    'wind_speed_80m': data['hourly']['wind_speed_80m'],
-                    'irradiance': data['hourly']['direct_normal_irradiance']
-                })
-                
-                # 应用权重
-                for col in ['temperature_2m', 'wind_speed_10m', 'wind_speed_80m', 'irradiance']:
-                    df[col] = df[col] * location['weight']
-                
-                all_location_data.append(df)
-                logger.info(f"successfully fetched historical weather data for {location['name']}")
-                
-            except Exception as e:
-                logger.error(f"Failed to fetch {location['name']} historical weather data: {e}")
+        for name, df in self._fetch_all_locations(self.ARCHIVE_URL, start_date, end_date):
+            if isinstance(df, Exception):
+                logger.error(f"Failed to fetch {name} historical weather data: {df}")
                 continue
+            
+            all_location_data.append(df)
+            logger.info(f"successfully fetched historical weather data for {name}")
         
         if not all_location_data:
             raise ValueError("not able to fetch historical weather data for any location")
         
         # merge and weight average
-        combined_df = pd.concat(all_location_data, ignore_index=True)
-        result_df = combined_df.groupby('timestamp').agg({
-            'temperature_2m': 'sum',
-            'wind_speed_10m': 'sum',
-            'wind_speed_80m': 'sum',
-            'irradiance': 'sum'
-        }).reset_index()
-        
-        result_df = result_df.rename(columns={
-            'temperature_2m': 'temperature_avg',
-            'wind_speed_10m': 'wind_speed_10m_avg',
-            'wind_speed_80m': 'wind_speed_80m_avg',
-            'irradiance': 'irradiance_avg'
-        })
+        result_df = _weighted_sum(all_location_data)
         
         logger.info(f"historical weather data weighted average completed, {len(result_df)} records")
+        # Only cache complete results: a missing location would leave the weights summing below 1
+        if self.use_cache and len(all_location_data) == len(self.locations):
+            write_cached(cache_path, result_df, log_prefix='[天气] ')
         return result_df
 
 
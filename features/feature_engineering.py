@@ -4,12 +4,15 @@ Feature engineering module
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from config.feature_config import SWEDISH_HOLIDAYS
+from config.feature_config import SWEDISH_HOLIDAYS_MD
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Holidays packed as month * 100 + day for vectorized np.isin lookups
+_HOLIDAY_MONTH_DAYS = np.array(sorted(month * 100 + day for month, day in SWEDISH_HOLIDAYS_MD))
+
 
 class FeatureEngineer:
     """Feature engineering class"""
@@ -27,21 +30,33 @@ class FeatureEngineer:
             DataFrame with added time features
         """
         df = df.copy()
-        df[timestamp_col] = pd.to_datetime(df[timestamp_col])
-        
-        # 基础时间特征
-        df['hour'] = df[timestamp_col].dt.hour
-        df['day_of_week'] = df[timestamp_col].dt.dayofweek  # 0=Monday
-        df['month'] = df[timestamp_col].dt.month
-        df['day_of_year'] = df[timestamp_col].dt.dayofyear
-        df['week_of_year'] = df[timestamp_col].dt.isocalendar().week
-        
-        # Weekend identifier
-        df['is_weekend'] = (df['day_of_week'] >= 5).astype(int)
-        
-        # Holiday identifier
-        df['is_holiday'] = df[timestamp_col].apply(
-            lambda x: 1 if x.strftime('%m-%d') in SWEDISH_HOLIDAYS else 0
+        if not pd.api.types.is_datetime64_any_dtype(df[timestamp_col]):
+            df[timestamp_col] = pd.to_datetime(df[timestamp_col])
+        
+        # 基础时间特征: derived from one datetime64 buffer of local wall-clock times
+        timestamps = df[timestamp_col]
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        ts_ns = timestamps.to_numpy(dtype='datetime64[ns]')
+        days = ts_ns.astype('datetime64[D]')
+        months = days.astype('datetime64[M]')
+        
+        hour = ((ts_ns - days) // np.timedelta64(1, 'h')).astype(np.int32)
+        day_of_week = ((days.view('i8') + 3) % 7).astype(np.int32)  # 0=Monday (1970-01-01 was a Thursday)
+        month = (months.view('i8') % 12 + 1).astype(np.int32)
+        day = ((days - months) // np.timedelta64(1, 'D') + 1).astype(np.int32)
+        day_of_year = ((days - days.astype('datetime64[Y]')) // np.timedelta64(1, 'D') + 1).astype(np.int32)
+        
+        df = df.assign(
+            hour=hour,
+            day_of_week=day_of_week,
+            month=month,
+            day_of_year=day_of_year,
+            week_of_year=df[timestamp_col].dt.isocalendar().week,
+            # Weekend identifier
+            is_weekend=(day_of_week >= 5).astype(int),
+            # Holiday identifier
+            is_holiday=np.isin(month * 100 + day, _HOLIDAY_MONTH_DAYS).astype(int)
         )
         
         # Periodic encoding (hour and month)
@@ -51,8 +66,8 @@ class FeatureEngineer:
         df['month_cos'] = np.cos(2 * np.pi * df['month'] / 12)
         
         # Peak hours (morning 7-9am, evening 5-8pm)
-        df['is_peak_morning'] = df['hour'].apply(lambda x: 1 if 7 <= x <= 9 else 0)
-        df['is_peak_evening'] = df['hour'].apply(lambda x: 1 if 17 <= x <= 20 else 0)
+        df['is_peak_morning'] = df['hour'].between(7, 9).astype(int)
+        df['is_peak_evening'] = df['hour'].between(17, 20).astype(int)
         
         logger.info(f"Created {len([c for c in df.columns if c not in [timestamp_col]])} time features")
         return df
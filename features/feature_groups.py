@@ -3,6 +3,7 @@ Hopsworks Feature Store management
 """
 import hopsworks
 import pandas as pd
+import numpy as np
 import os
 from pathlib import Path
 from config.settings import (
@@ -24,6 +25,20 @@ LOCAL_DATA_DIR = Path("data/local_cache")
 LOCAL_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# Decimals kept when float32 columns are widened for the feature store. ENTSO-E (MW) and the
+# weighted Open-Meteo averages carry at most two decimals, which float32 still resolves exactly
+# below 131072, so rounding drops only the float32 representation error (45.12, not 45.119998931884766)
+FLOAT32_DECIMALS = 2
+
+
+def _to_float64(series: pd.Series) -> pd.Series:
+    """Cast a numeric column to float64 for the feature store (float32 rounded to FLOAT32_DECIMALS)"""
+    series = pd.to_numeric(series, errors='coerce')
+    if series.dtype == np.float32:
+        return np.round(series.astype('float64'), FLOAT32_DECIMALS)
+    return series.astype('float64')
+
+
 class FeatureStoreManager:
     """Hopsworks Feature Store manager"""
     
@@ -84,7 +99,7 @@ class FeatureStoreManager:
         try:
             for col in ['price', 'load_forecast', 'wind_forecast', 'solar_forecast']:
                 if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+                    df[col] = _to_float64(df[col])
         except Exception as e:
             logger.warning(f"Failed to cast electricity numeric columns to float: {e}")
 
@@ -131,7 +146,7 @@ class FeatureStoreManager:
         try:
             for col in ['temperature_avg', 'wind_speed_10m_avg', 'wind_speed_80m_avg', 'irradiance_avg']:
                 if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+                    df[col] = _to_float64(df[col])
         except Exception as e:
             logger.warning(f"Failed to cast weather numeric columns to float: {e}")
         
@@ -163,7 +178,7 @@ class FeatureStoreManager:
             numeric_cols = df.select_dtypes(include=['int64', 'float64', 'int32', 'float32']).columns
             for col in numeric_cols:
                 if col != 'timestamp':  # Skip timestamp
-                    df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+                    df[col] = _to_float64(df[col])
         except Exception as e:
             logger.warning(f"Failed to cast numeric columns to float: {e}")
         
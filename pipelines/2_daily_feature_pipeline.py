@@ -47,7 +47,8 @@ def normalize_dataframe_timestamps(df: pd.DataFrame, time_col: str = 'timestamp'
         return df
 
     df = df.copy()
-    df[time_col] = pd.to_datetime(df[time_col])
+    if not pd.api.types.is_datetime64_any_dtype(df[time_col]):
+        df[time_col] = pd.to_datetime(df[time_col])
 
     # Localize naive timestamps
     if df[time_col].dt.tz is None:
@@ -122,9 +123,9 @@ def daily_update():
         try:
             # 如果为 tz-aware（例如 UTC），直接转换；否则先 localize 到 UTC 再转换
             if cleaned_df['timestamp'].dt.tz is None:
-                cleaned_df['timestamp'] = pd.to_datetime(cleaned_df['timestamp']).dt.tz_localize('UTC').dt.tz_convert(TIMEZONE)
+                cleaned_df['timestamp'] = cleaned_df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(TIMEZONE)
             else:
-                cleaned_df['timestamp'] = pd.to_datetime(cleaned_df['timestamp']).dt.tz_convert(TIMEZONE)
+                cleaned_df['timestamp'] = cleaned_df['timestamp'].dt.tz_convert(TIMEZONE)
             logger.info("已将合并后时间戳转换为 %s 时区以便展示", TIMEZONE)
         except Exception as e:
             logger.warning("转换合并后时间戳到 %s 时区失败: %s。保留原始时间戳。", TIMEZONE, e)
@@ -0,0 +1,6 @@
+"""
+Shared pytest configuration
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+"""
+Tests for the on-disk DataFrame cache
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.cache import read_cached, write_cached
+
+
+def _frame() -> pd.DataFrame:
+    timestamps = pd.date_range('2024-01-01', periods=24, freq='h', tz='Europe/Stockholm')
+    return pd.DataFrame({'timestamp': timestamps, 'price': np.arange(24, dtype=np.float64)})
+
+
+def test_write_then_read_round_trips(tmp_path):
+    path = tmp_path / 'prices.parquet'
+
+    write_cached(path, _frame())
+
+    pd.testing.assert_frame_equal(read_cached(path), _frame())
+    assert list(tmp_path.iterdir()) == [path]  # no temporary file left behind
+
+
+def test_write_replaces_an_existing_file(tmp_path):
+    path = tmp_path / 'prices.parquet'
+    write_cached(path, _frame())
+
+    write_cached(path, _frame().head(3))
+
+    assert len(read_cached(path)) == 3
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_failed_write_keeps_the_old_file_and_cleans_up(tmp_path, monkeypatch):
+    path = tmp_path / 'prices.parquet'
+    write_cached(path, _frame())
+
+    def broken_to_parquet(self, target, **kwargs):
+        with open(target, 'wb') as f:
+            f.write(b'PAR1 truncated')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', broken_to_parquet)
+    write_cached(path, _frame().head(3))  # logged, not raised
+
+    assert list(tmp_path.iterdir()) == [path]
+    monkeypatch.undo()
+    assert len(read_cached(path)) == 24
+
+
+def test_unreadable_file_is_a_miss_and_deleted(tmp_path):
+    path = tmp_path / 'prices.parquet'
+    path.write_bytes(b'not a parquet file')
+
+    assert read_cached(path) is None
+    assert not path.exists()
+
+
+@pytest.mark.parametrize('age_hours, expected_hit', [(1, True), (3, False)])
+def test_max_age(tmp_path, age_hours, expected_hit):
+    path = tmp_path / 'prices.parquet'
+    write_cached(path, _frame())
+    modified = time.time() - age_hours * 3600
+    os.utime(path, (modified, modified))
+
+    df = read_cached(path, max_age=pd.Timedelta(hours=2))
+
+    assert (df is not None) == expected_hit
+    assert path.exists()  # expired files are overwritten by the next write, not deleted
+
+
+def test_missing_file_is_a_miss(tmp_path):
+    assert read_cached(tmp_path / 'missing.parquet') is None
@@ -0,0 +1,185 @@
+"""
+Tests for the data cleaning module
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import data_cleaner
+from data.data_cleaner import DataCleaner
+
+
+def _market_frame(n_hours: int = 48) -> pd.DataFrame:
+    """Hourly market-like frame with a few gaps and one outlier"""
+    timestamps = pd.date_range('2024-01-01', periods=n_hours, freq='h', tz='Europe/Stockholm')
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'price': np.linspace(10.0, 60.0, n_hours),
+        'load_forecast': np.linspace(10_000.0, 12_000.0, n_hours),
+    })
+    df.loc[5:7, 'price'] = np.nan
+    df.loc[10, 'price'] = 5_000.0
+    df.loc[20, 'load_forecast'] = 1e9
+    return df
+
+
+@pytest.mark.parametrize('method', [
+    lambda df: DataCleaner.interpolate_missing(df),
+    lambda df: DataCleaner.remove_outliers(df, ['load_forecast'], n_std=2.0),
+    lambda df: DataCleaner.validate_price_range(df),
+    lambda df: DataCleaner.ensure_hourly_continuity(df.drop(index=[30, 31])),
+    DataCleaner.clean_pipeline,
+])
+def test_methods_leave_their_input_untouched(method):
+    df = _market_frame()
+    original = df.copy()
+
+    method(df)
+
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_clean_pipeline_result_does_not_share_the_input_data():
+    df = _market_frame()
+
+    cleaned = DataCleaner.clean_pipeline(df)
+    cleaned.iloc[0, cleaned.columns.get_loc('price')] = -1.0  # in-place write into the result
+
+    assert df.loc[0, 'price'] == 10.0
+
+
+def _series_frame(values, dtype=np.float64) -> pd.DataFrame:
+    """Hourly frame with a single 'price' column"""
+    timestamps = pd.date_range('2024-01-01', periods=len(values), freq='h', tz='Europe/Stockholm')
+    return pd.DataFrame({'timestamp': timestamps, 'price': np.array(values, dtype=dtype)})
+
+
+def test_interpolate_missing_interpolates_small_gaps_and_forward_fills_large_ones():
+    nan = np.nan
+    df = _series_frame([nan, 1.0, nan, nan, 4.0, 5.0, nan, nan, nan, nan, 10.0])
+
+    filled = DataCleaner.interpolate_missing(df, max_gap_hours=3)
+
+    np.testing.assert_array_equal(
+        filled['price'].to_numpy(),
+        [1.0,                      # leading gap: nearest valid value
+         1.0, 2.0, 3.0, 4.0,       # 2-hour gap: interpolated
+         5.0, 5.0, 5.0, 5.0, 5.0,  # 4-hour gap: forward filled
+         10.0]
+    )
+
+
+def test_interpolate_missing_keeps_a_gap_of_exactly_max_gap_hours_interpolated():
+    df = _series_frame([0.0, np.nan, np.nan, np.nan, 4.0])
+
+    filled = DataCleaner.interpolate_missing(df, max_gap_hours=3)
+
+    np.testing.assert_array_equal(filled['price'].to_numpy(), [0.0, 1.0, 2.0, 3.0, 4.0])
+
+
+def _jit_block_sizes():
+    pytest.importorskip('numba')
+    return data_cleaner._missing_block_sizes_jit
+
+
+@pytest.mark.parametrize('block_sizes', [
+    lambda: data_cleaner._missing_block_sizes_numpy,
+    lambda: data_cleaner._missing_block_sizes_loop,
+    _jit_block_sizes,
+], ids=['numpy', 'python-loop', 'numba'])
+@pytest.mark.parametrize('is_missing', [
+    [False, True, True, False, True, False, False, True, True, True],
+    [True, True, False, True],  # blocks at both edges
+    [True] * 5,
+    [False] * 5,
+    [],
+])
+def test_missing_block_sizes(block_sizes, is_missing):
+    is_missing = np.array(is_missing, dtype=bool)
+    # Reference: size of each run of True values, 0 elsewhere
+    expected = np.zeros(len(is_missing), dtype=np.int64)
+    start = None
+    for i, missing in enumerate([*is_missing, False]):
+        if missing and start is None:
+            start = i
+        elif not missing and start is not None:
+            expected[start:i] = i - start
+            start = None
+
+    sizes = block_sizes()(is_missing)
+
+    np.testing.assert_array_equal(sizes, expected)
+    assert sizes.dtype == np.int64
+
+
+def test_missing_block_sizes_uses_numba_only_for_long_columns(monkeypatch):
+    jit_calls = []
+    monkeypatch.setattr(data_cleaner, '_missing_block_sizes_jit', lambda mask: jit_calls.append(mask) or mask)
+    monkeypatch.setattr(data_cleaner, 'NUMBA_MIN_ROWS', 10)
+
+    data_cleaner._missing_block_sizes(np.zeros(9, dtype=bool))
+    assert not jit_calls
+
+    data_cleaner._missing_block_sizes(np.zeros(10, dtype=bool))
+    assert len(jit_calls) == 1
+
+
+def _gappy_market_frame() -> pd.DataFrame:
+    """Frame mixing float64, float32 and integer columns with different gap patterns"""
+    df = _market_frame(n_hours=24)
+    df['wind_forecast'] = np.linspace(100.0, 300.0, 24).astype(np.float32)
+    df['hour'] = np.arange(24, dtype=np.int64)
+    df.loc[0:1, 'load_forecast'] = np.nan
+    df.loc[12:17, 'wind_forecast'] = np.nan
+    return df
+
+
+def test_interpolate_missing_fills_all_columns_like_one_column_at_a_time():
+    df = _gappy_market_frame()
+
+    filled = DataCleaner.interpolate_missing(df)
+
+    for col in ['price', 'load_forecast', 'wind_forecast']:
+        one_column = DataCleaner.interpolate_missing(df[['timestamp', col]])
+        pd.testing.assert_series_equal(filled[col], one_column[col])
+    assert not filled.isna().any().any()
+    # Each column keeps its own dtype
+    pd.testing.assert_series_equal(filled.dtypes, df.dtypes)
+
+
+def test_interpolate_missing_leaves_gap_free_columns_alone():
+    df = _gappy_market_frame().drop(columns=['load_forecast', 'wind_forecast'])
+    df.loc[3, 'price'] = np.nan
+
+    filled = DataCleaner.interpolate_missing(df)
+
+    pd.testing.assert_series_equal(filled['hour'], df['hour'])
+    # Not rewritten: the result still shares the input's data for the gap-free column
+    assert np.shares_memory(filled['hour'].to_numpy(), df['hour'].to_numpy())
+    assert not np.shares_memory(filled['price'].to_numpy(), df['price'].to_numpy())
+
+
+def test_interpolate_missing_only_fills_the_requested_columns():
+    df = _gappy_market_frame()
+
+    filled = DataCleaner.interpolate_missing(df, numeric_cols=['wind_forecast'])
+
+    assert not filled['wind_forecast'].isna().any()
+    pd.testing.assert_series_equal(filled['price'], df['price'])
+    pd.testing.assert_series_equal(filled['load_forecast'], df['load_forecast'])
+
+
+def test_interpolate_missing_sizes_each_columns_gaps_from_its_own_mask():
+    nan = np.nan
+    timestamps = pd.date_range('2024-01-01', periods=8, freq='h', tz='Europe/Stockholm')
+    df = pd.DataFrame({
+        'timestamp': timestamps,
+        'a': [0.0, nan, nan, nan, nan, 5.0, 6.0, 7.0],    # 4-hour gap: forward filled
+        'gap_free': np.arange(8, dtype=np.float64),
+        'b': [0.0, 1.0, 2.0, 3.0, nan, nan, 6.0, 7.0],    # 2-hour gap: interpolated
+    })
+
+    filled = DataCleaner.interpolate_missing(df, max_gap_hours=3)
+
+    np.testing.assert_array_equal(filled['a'].to_numpy(), [0.0, 0.0, 0.0, 0.0, 0.0, 5.0, 6.0, 7.0])
+    np.testing.assert_array_equal(filled['b'].to_numpy(), np.arange(8, dtype=np.float64))
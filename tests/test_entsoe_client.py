@@ -0,0 +1,397 @@
+"""
+Tests for the ENTSO-E client
+"""
+import io
+import threading
+import time
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from config.settings import TIMEZONE
+from data import entsoe_client
+from data.entsoe_client import ENTSOEClient
+
+START = pd.Timestamp('2024-01-01', tz=TIMEZONE)
+END = pd.Timestamp('2024-04-01', tz=TIMEZONE)  # three month windows
+
+PRICE_DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Publication_MarketDocument xmlns="{entsoe_client.NS_PUBLICATION}">
+  <mRID>1</mRID>
+  <TimeSeries>
+    <Period>
+      <timeInterval><start>2023-12-31T23:00Z</start><end>2024-01-01T02:00Z</end></timeInterval>
+      <resolution>PT60M</resolution>
+      <Point><position>1</position><price.amount>45.12</price.amount></Point>
+      <Point><position>2</position><price.amount>-3.5</price.amount></Point>
+      <Point><position>3</position></Point>
+    </Period>
+  </TimeSeries>
+  <TimeSeries>
+    <Period>
+      <timeInterval><start>2024-01-01T02:00Z</start><end>2024-01-01T04:00Z</end></timeInterval>
+      <resolution>PT60M</resolution>
+      <Point><position>1</position><price.amount>50</price.amount></Point>
+      <Point><position>2</position><price.amount>51.25</price.amount></Point>
+    </Period>
+  </TimeSeries>
+</Publication_MarketDocument>
+""".encode()
+
+GENERATION_DOCUMENT = f"""<?xml version="1.0" encoding="UTF-8"?>
+<GL_MarketDocument xmlns="{entsoe_client.NS_GENERATION_LOAD}">
+  <TimeSeries>
+    <MktPSRType><psrType>B19</psrType></MktPSRType>
+    <Period>
+      <timeInterval><start>2023-12-31T23:00Z</start><end>2024-01-01T01:00Z</end></timeInterval>
+      <resolution>PT60M</resolution>
+      <Point><position>1</position><quantity>1200</quantity></Point>
+      <Point><position>2</position><quantity>1300</quantity></Point>
+    </Period>
+  </TimeSeries>
+  <TimeSeries>
+    <MktPSRType><psrType>B16</psrType></MktPSRType>
+    <Period>
+      <timeInterval><start>2023-12-31T23:00Z</start><end>2024-01-01T01:00Z</end></timeInterval>
+      <resolution>PT60M</resolution>
+      <Point><position>1</position><quantity>0</quantity></Point>
+      <Point><position>2</position><quantity>15.5</quantity></Point>
+    </Period>
+  </TimeSeries>
+</GL_MarketDocument>
+""".encode()
+
+
+def _hourly_frame(start: pd.Timestamp, end: pd.Timestamp, column: str = 'price') -> pd.DataFrame:
+    """Hourly frame covering [start, end), like a successful fetch"""
+    timestamps = pd.date_range(start, end, freq='h', inclusive='left')
+    return pd.DataFrame({'timestamp': timestamps, column: np.arange(len(timestamps), dtype=np.float64)})
+
+
+def _http_error(status_code: int, retry_after: str = None) -> requests.HTTPError:
+    """HTTPError carrying a response with the given status code (and Retry-After header)"""
+    response = requests.Response()
+    response.status_code = status_code
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return requests.HTTPError(f"{status_code} error", response=response)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client whose disk cache lives in a temporary directory"""
+    monkeypatch.setattr(entsoe_client, 'MARKET_CACHE_DIR', tmp_path)
+    return ENTSOEClient(api_key='test-key', use_cache=True)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps of the chunk workers instead of waiting"""
+    delays = []
+    monkeypatch.setattr(entsoe_client.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.fixture(params=['lxml', 'stdlib'])
+def xml_backend(request, monkeypatch):
+    """Run a parsing test with lxml (XPath fast path) and with the stdlib ElementTree fallback"""
+    if request.param == 'lxml':
+        if not entsoe_client._HAS_XPATH:
+            pytest.skip("lxml is not installed")
+    else:
+        monkeypatch.setattr(entsoe_client, 'etree', ElementTree)
+        monkeypatch.setattr(entsoe_client, '_HAS_XPATH', False)
+        monkeypatch.setattr(entsoe_client, '_PARSER_OPTIONS', {})
+    return request.param
+
+
+# ---------------------------------------------------------------------------
+# XML parsing
+# ---------------------------------------------------------------------------
+
+def test_price_periods_are_parsed(xml_backend):
+    tags = entsoe_client.PUBLICATION_TAGS
+    periods = [
+        (period.findtext(tags.start), *entsoe_client._point_arrays(period, tags, tags.price))
+        for period, _ in entsoe_client._iter_periods(io.BytesIO(PRICE_DOCUMENT), tags)
+    ]
+
+    assert [start for start, _, _ in periods] == ['2023-12-31T23:00Z', '2024-01-01T02:00Z']
+    # The Point without a price is skipped
+    np.testing.assert_array_equal(periods[0][1], [1, 2])
+    np.testing.assert_array_equal(periods[0][2], [45.12, -3.5])
+    np.testing.assert_array_equal(periods[1][1], [1, 2])
+    np.testing.assert_array_equal(periods[1][2], [50.0, 51.25])
+
+
+def test_psr_types_follow_their_time_series(xml_backend):
+    tags = entsoe_client.GENERATION_LOAD_TAGS
+    quantities = {}
+    # Tags detected from the root namespace
+    for period, psr_type in entsoe_client._iter_periods(io.BytesIO(GENERATION_DOCUMENT)):
+        quantities[psr_type] = entsoe_client._point_arrays(period, tags, tags.quantity)[1]
+
+    assert list(quantities) == ['B19', 'B16']
+    np.testing.assert_array_equal(quantities['B19'], [1200.0, 1300.0])
+    np.testing.assert_array_equal(quantities['B16'], [0.0, 15.5])
+
+
+# ---------------------------------------------------------------------------
+# Chunked fetches
+# ---------------------------------------------------------------------------
+
+def test_fetch_chunked_skips_a_failed_window(client):
+    def fetch(start, end):
+        if start.month == 2:
+            raise requests.ConnectionError("connection reset")
+        return _hourly_frame(start, end)
+
+    df = client._fetch_chunked(fetch, START, END)
+
+    assert not entsoe_client._is_complete(df)
+    assert set(df['timestamp'].dt.month) == {1, 3}
+    assert df['timestamp'].is_monotonic_increasing and df['timestamp'].is_unique
+
+
+def test_fetch_chunked_requeues_a_rate_limited_window(client, sleeps):
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(start, end):
+        with lock:
+            calls.append(start.month)
+            first_february_call = start.month == 2 and calls.count(2) == 1
+        if first_february_call:
+            raise _http_error(429)
+        return _hourly_frame(start, end)
+
+    df = client._fetch_chunked(fetch, START, END)
+
+    assert entsoe_client._is_complete(df)
+    assert calls.count(2) == 2
+    pd.testing.assert_series_equal(
+        df['timestamp'], pd.Series(pd.date_range(START, END, freq='h', inclusive='left'), name='timestamp')
+    )
+    # Requeued behind a jittered exponential backoff (no Retry-After), first attempt: 0.5-1x the base
+    assert len(sleeps) == 1
+    assert entsoe_client.RATE_LIMIT_BASE_DELAY / 2 <= sleeps[0] <= entsoe_client.RATE_LIMIT_BASE_DELAY
+
+
+def test_fetch_chunked_honours_retry_after(client, sleeps):
+    calls = []
+
+    def fetch(start, end):
+        calls.append(start.month)
+        if start.month == 1 and calls.count(1) == 1:
+            raise _http_error(503, retry_after='7')
+        return _hourly_frame(start, end)
+
+    client._fetch_chunked(fetch, START, END)
+
+    assert sleeps == [7.0]
+    # Multiplicative decrease on the first rate-limit response
+    assert client._concurrency < entsoe_client.MAX_CHUNK_CONCURRENCY
+
+
+def test_fetch_chunked_does_not_retry_other_http_errors(client):
+    calls = []
+
+    def fetch(start, end):
+        calls.append(start.month)
+        if start.month == 3:
+            raise _http_error(400)
+        return _hourly_frame(start, end)
+
+    df = client._fetch_chunked(fetch, START, END)
+
+    assert calls.count(3) == 1
+    assert not entsoe_client._is_complete(df)
+
+
+def test_fetch_chunked_raises_when_every_window_fails(client):
+    def fetch(start, end):
+        raise requests.ConnectionError("network down")
+
+    with pytest.raises(requests.ConnectionError):
+        client._fetch_chunked(fetch, START, END)
+
+
+def test_chunk_windows_leave_rate_limits_to_the_controller(client):
+    sessions = []
+
+    def fetch(start, end):
+        sessions.append(client._request_session)
+        return _hourly_frame(start, end)
+
+    client._fetch_chunked(fetch, START, END)
+
+    assert set(map(id, sessions)) == {id(client._chunk_session)}
+    assert client._request_session is client._session
+    chunk_retry = client._chunk_session.get_adapter(entsoe_client.ENTSOE_API_URL).max_retries
+    assert not set(entsoe_client.RATE_LIMIT_STATUS_CODES) & set(chunk_retry.status_forcelist)
+
+
+def test_concurrent_chunked_fetches_share_one_concurrency_limit(client):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fetch(start, end):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return _hourly_frame(start, end)
+
+    year_end = pd.Timestamp('2025-01-01', tz=TIMEZONE)
+    threads = [
+        threading.Thread(target=client._fetch_chunked, args=(fetch, START, year_end))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak <= entsoe_client.MAX_CHUNK_CONCURRENCY
+    assert client._in_flight == 0
+
+
+# ---------------------------------------------------------------------------
+# Cache rules
+# ---------------------------------------------------------------------------
+
+def test_disk_cache_skips_incomplete_results(client, tmp_path):
+    fetch = entsoe_client._disk_cached('day_ahead_prices')(
+        lambda self, start, end: entsoe_client._mark_incomplete(_hourly_frame(start, end))
+    )
+
+    fetch(client, START, END)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_disk_cache_serves_complete_results(client, tmp_path):
+    calls = []
+
+    def fetch(self, start, end):
+        calls.append(start)
+        return _hourly_frame(start, end)
+
+    cached_fetch = entsoe_client._disk_cached('day_ahead_prices')(fetch)
+    first = cached_fetch(client, START, END)
+    second = cached_fetch(client, START, END)
+
+    assert len(calls) == 1
+    assert len(list(tmp_path.iterdir())) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def _stub_market_fetches(client, monkeypatch, fail_load: bool = False, stub_prices: bool = True):
+    """Replace the fetches of fetch_all_market_data with in-memory ones"""
+    def fetch_load(start, end):
+        if fail_load:
+            raise requests.ConnectionError("connection reset")
+        return _hourly_frame(start, end, 'load_forecast')
+
+    def fetch_wind_solar(start, end):
+        return _hourly_frame(start, end, 'wind_forecast').assign(solar_forecast=0.0)
+
+    if stub_prices:
+        monkeypatch.setattr(client, 'fetch_day_ahead_prices', _hourly_frame)
+    monkeypatch.setattr(client, 'fetch_load_forecast', fetch_load)
+    monkeypatch.setattr(client, 'fetch_wind_solar_forecast', fetch_wind_solar)
+
+
+def test_market_cache_skips_a_degraded_merge(client, tmp_path, monkeypatch):
+    _stub_market_fetches(client, monkeypatch, fail_load=True)
+
+    df = client.fetch_all_market_data('2024-01-01', '2024-01-03')
+
+    assert df['load_forecast'].isna().all()
+    assert not entsoe_client._is_complete(df)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_market_cache_skips_a_partial_chunked_fetch(client, tmp_path, monkeypatch):
+    _stub_market_fetches(client, monkeypatch, stub_prices=False)
+
+    def fetch_prices_window(start, end):
+        if start.month == 2:
+            raise requests.ConnectionError("connection reset")
+        return _hourly_frame(start, end)
+
+    # The real fetch_day_ahead_prices splits the range and calls this window fetch per month
+    monkeypatch.setattr(client, '_fetch_day_ahead_prices_window', fetch_prices_window)
+
+    df = client.fetch_all_market_data('2024-01-01', '2024-04-01')
+
+    assert not entsoe_client._is_complete(df)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_market_cache_stores_a_complete_merge(client, tmp_path, monkeypatch):
+    _stub_market_fetches(client, monkeypatch)
+
+    df = client.fetch_all_market_data('2024-01-01', '2024-01-03')
+
+    assert entsoe_client._is_complete(df)
+    assert not df.isna().any().any()
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+# ---------------------------------------------------------------------------
+# Gap fill kernels
+# ---------------------------------------------------------------------------
+
+def _gappy_values(dtype, n_rows: int = 60) -> np.ndarray:
+    """Float array with random gaps, a leading gap, a trailing gap and an all-NaN column"""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(n_rows, 4)).astype(dtype)
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:7, 0] = np.nan   # leading gap
+    values[-5:, 1] = np.nan  # trailing gap
+    values[:, 2] = np.nan    # nothing to fill from
+    return values
+
+
+def _jit_fill():
+    pytest.importorskip('numba')
+    return entsoe_client._ffill_bfill_jit
+
+
+@pytest.mark.parametrize('kernel', [
+    lambda: entsoe_client._ffill_bfill_numpy,
+    lambda: entsoe_client._ffill_bfill_columns,
+    _jit_fill,
+], ids=['numpy', 'python-loop', 'numba'])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_ffill_bfill_matches_pandas(kernel, dtype):
+    values = _gappy_values(dtype)
+    expected = pd.DataFrame(values).ffill().bfill().to_numpy()
+
+    filled = np.asfortranarray(values.copy())
+    kernel()(filled)
+
+    np.testing.assert_array_equal(filled, expected)
+    assert filled.dtype == dtype
+
+
+def test_ffill_bfill_uses_numba_only_for_long_frames(monkeypatch):
+    jit_calls = []
+    monkeypatch.setattr(entsoe_client, '_ffill_bfill_jit', jit_calls.append)
+    monkeypatch.setattr(entsoe_client, 'NUMBA_MIN_ROWS', 100)
+
+    short = _gappy_values(np.float64, n_rows=99)
+    entsoe_client._ffill_bfill_kernel(short)
+    assert not jit_calls and not np.isnan(short[:, [0, 1, 3]]).any()
+
+    long = _gappy_values(np.float64, n_rows=100)
+    entsoe_client._ffill_bfill_kernel(long)
+    assert len(jit_calls) == 1 and jit_calls[0] is long
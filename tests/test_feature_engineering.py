@@ -0,0 +1,46 @@
+"""
+Tests for the feature engineering module
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.feature_config import SWEDISH_HOLIDAYS_MD
+from features.feature_engineering import FeatureEngineer
+
+
+@pytest.mark.parametrize('timestamps', [
+    # Leap day, both DST switches and the year change, in local time
+    pd.date_range('2023-12-30', '2024-12-31 23:00', freq='h', tz='Europe/Stockholm'),
+    pd.date_range('1969-12-25', '1970-01-05', freq='h'),  # naive, around the epoch
+    pd.date_range('2024-06-01', periods=48, freq='h').strftime('%Y-%m-%d %H:%M:%S'),  # strings
+], ids=['stockholm', 'naive-epoch', 'strings'])
+def test_time_features_match_the_pandas_accessors(timestamps):
+    df = pd.DataFrame({'timestamp': timestamps, 'price': 1.0})
+
+    features = FeatureEngineer.create_time_features(df)
+
+    ts = pd.to_datetime(pd.Series(timestamps)).dt
+    np.testing.assert_array_equal(features['hour'], ts.hour)
+    np.testing.assert_array_equal(features['day_of_week'], ts.dayofweek)
+    np.testing.assert_array_equal(features['month'], ts.month)
+    np.testing.assert_array_equal(features['day_of_year'], ts.dayofyear)
+    np.testing.assert_array_equal(features['week_of_year'], ts.isocalendar().week)
+    np.testing.assert_array_equal(features['is_weekend'], (ts.dayofweek >= 5).astype(int))
+    expected_holiday = [int((m, d) in SWEDISH_HOLIDAYS_MD) for m, d in zip(ts.month, ts.day)]
+    np.testing.assert_array_equal(features['is_holiday'], expected_holiday)
+    np.testing.assert_array_equal(features['is_peak_morning'], ts.hour.between(7, 9).astype(int))
+    np.testing.assert_array_equal(features['is_peak_evening'], ts.hour.between(17, 20).astype(int))
+
+
+def test_holidays_are_flagged_for_the_whole_day():
+    timestamps = pd.date_range('2024-12-24', '2024-12-26 23:00', freq='h', tz='Europe/Stockholm')
+    df = pd.DataFrame({'timestamp': timestamps})
+
+    features = FeatureEngineer.create_time_features(df)
+
+    flagged = features.groupby(features['timestamp'].dt.day)['is_holiday'].agg(['min', 'max'])
+    for day, row in flagged.iterrows():
+        expected = int((12, day) in SWEDISH_HOLIDAYS_MD)
+        assert row['min'] == row['max'] == expected
+    assert features['is_holiday'].any()
@@ -0,0 +1,176 @@
+"""
+Tests for the Open-Meteo weather client
+"""
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from data import weather_client
+from data.weather_client import WeatherClient
+
+LOCATIONS = [
+    {'name': 'A', 'lat': 59.0, 'lon': 18.0, 'weight': 0.5},
+    {'name': 'B', 'lat': 60.0, 'lon': 17.0, 'weight': 0.3},
+    {'name': 'C', 'lat': 58.0, 'lon': 16.0, 'weight': 0.2},
+]
+
+
+def _hourly_payload(lat: float, n_hours: int = 24) -> dict:
+    """Open-Meteo-like 'hourly' block whose values depend on the latitude"""
+    hours = np.arange(n_hours, dtype=np.float64)
+    return {
+        'time': [f'2024-01-01T{h:02d}:00' for h in range(n_hours)],
+        'temperature_2m': (lat - 60.0 + hours).tolist(),
+        'wind_speed_10m': (lat / 10 + hours).tolist(),
+        'wind_speed_80m': (lat / 5 + hours).tolist(),
+        'direct_normal_irradiance': (lat * 2 + hours).tolist(),
+    }
+
+
+class FakeSession:
+    """Stands in for requests.Session: answers each location from _hourly_payload"""
+    
+    def __init__(self, failing_lat: float = None):
+        self.failing_lat = failing_lat
+        self.calls = []
+        self.lock = threading.Lock()
+    
+    def get(self, url, params, timeout):
+        with self.lock:
+            self.calls.append((url, params['latitude']))
+        if params['latitude'] == self.failing_lat:
+            raise requests.ConnectionError("connection reset")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'hourly': _hourly_payload(params['latitude'])}).encode()
+        return response
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(weather_client, 'WEATHER_CACHE_DIR', tmp_path)
+    return tmp_path
+
+
+def _client(session: FakeSession, use_cache: bool = True) -> WeatherClient:
+    client = WeatherClient(locations=LOCATIONS, use_cache=use_cache)
+    client._session = session
+    return client
+
+
+# ---------------------------------------------------------------------------
+# Disk cache
+# ---------------------------------------------------------------------------
+
+def test_forecast_is_served_from_the_cache(cache_dir):
+    session = FakeSession()
+    client = _client(session)
+
+    first = client.fetch_forecast('2024-01-01', '2024-01-01')
+    second = client.fetch_forecast('2024-01-01', '2024-01-01')
+
+    assert len(session.calls) == len(LOCATIONS)
+    assert len(list(cache_dir.iterdir())) == 1
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_result_missing_a_location_is_not_cached(cache_dir):
+    session = FakeSession(failing_lat=60.0)
+
+    df = _client(session).fetch_historical('2024-01-01', '2024-01-01')
+
+    assert len(df) == 24
+    assert list(cache_dir.iterdir()) == []
+
+
+def test_cache_can_be_bypassed(cache_dir):
+    session = FakeSession()
+    client = _client(session, use_cache=False)
+
+    client.fetch_forecast('2024-01-01', '2024-01-01')
+    client.fetch_forecast('2024-01-01', '2024-01-01')
+
+    assert len(session.calls) == 2 * len(LOCATIONS)
+    assert list(cache_dir.iterdir()) == []
+
+
+# ---------------------------------------------------------------------------
+# Concurrent location fetches
+# ---------------------------------------------------------------------------
+
+class BarrierSession(FakeSession):
+    """Only answers once every location's request is in flight at the same time"""
+    
+    def __init__(self, n_locations: int):
+        super().__init__()
+        self.barrier = threading.Barrier(n_locations, timeout=5)
+    
+    def get(self, url, params, timeout):
+        self.barrier.wait()
+        # Let the first location finish last
+        if params['latitude'] == LOCATIONS[0]['lat']:
+            threading.Event().wait(0.05)
+        return super().get(url, params, timeout)
+
+
+def test_locations_are_fetched_concurrently_and_returned_in_order():
+    client = _client(BarrierSession(len(LOCATIONS)), use_cache=False)
+
+    results = client._fetch_all_locations(client.BASE_URL, '2024-01-01', '2024-01-01')
+
+    assert [name for name, _ in results] == ['A', 'B', 'C']
+    for (_, df), location in zip(results, LOCATIONS):
+        expected = _hourly_payload(location['lat'])['temperature_2m']
+        np.testing.assert_allclose(df['temperature_2m'], np.float32(expected) * np.float32(location['weight']))
+
+
+def test_a_failed_location_is_returned_as_its_exception():
+    client = _client(FakeSession(failing_lat=60.0), use_cache=False)
+
+    results = client._fetch_all_locations(client.BASE_URL, '2024-01-01', '2024-01-01')
+
+    assert [name for name, _ in results] == ['A', 'B', 'C']
+    assert isinstance(results[1][1], requests.ConnectionError)
+    assert all(isinstance(df, pd.DataFrame) for _, df in (results[0], results[2]))
+
+
+# ---------------------------------------------------------------------------
+# Weighted average
+# ---------------------------------------------------------------------------
+
+def _weighted_frames() -> list:
+    """Weighted per-location frames on a shared hourly grid, one value missing"""
+    client = _client(FakeSession(), use_cache=False)
+    frames = [client._fetch_location(client.BASE_URL, loc, '2024-01-01', '2024-01-01') for loc in client.locations]
+    frames[1].loc[5, 'wind_speed_80m'] = np.nan
+    return frames
+
+
+def test_weighted_sum_is_the_weighted_average_of_the_locations():
+    result = weather_client._weighted_sum(_weighted_frames())
+
+    expected = sum(
+        loc['weight'] * np.asarray(_hourly_payload(loc['lat'])['temperature_2m'])
+        for loc in LOCATIONS
+    )
+    np.testing.assert_allclose(result['temperature_avg'], expected, rtol=1e-6)
+    assert list(result.columns) == [
+        'timestamp', 'temperature_avg', 'wind_speed_10m_avg', 'wind_speed_80m_avg', 'irradiance_avg'
+    ]
+
+
+def test_weighted_sum_matches_the_groupby_sum_for_mismatched_grids():
+    frames = _weighted_frames()
+    fast = weather_client._weighted_sum(frames)
+
+    # A shuffled location no longer shares the grid and takes the groupby path
+    shuffled = [frames[0], frames[1].sample(frac=1, random_state=0), frames[2]]
+    grouped = weather_client._weighted_sum(shuffled)
+
+    pd.testing.assert_frame_equal(fast, grouped, check_dtype=False, rtol=1e-6)
+    # Missing values count as 0, like in the groupby sum
+    assert not fast.isna().any().any()